@@ -0,0 +1,262 @@
+"""
+Offline batch scoring of image folders and video files.
+
+    python batch_score.py dataset/train --crops --output scores.csv
+    python batch_score.py photos/ --output scores.parquet
+    python batch_score.py interview.mp4 --every 5 --output scores.csv
+
+Face detection runs in a process pool (one FaceDetector per worker, files or
+video segments handed out in chunks). The 48x48 crops are cut like
+``inference.crop_faces`` in the live app, sent back as uint8 and go through
+the model in large batches. Every face becomes one row with its box and
+per-class probabilities (p_angry, p_happy, ...).
+
+``--crops`` treats every image as an already cropped face (like
+dataset/train) and skips detection; if an image sits in a folder named after
+a class, that class is written to the ``label`` column and the agreement
+with the model is printed at the end.
+"""
+import argparse
+import csv
+import os
+import time
+import multiprocessing
+
+import cv2
+import numpy as np
+
+from face_detection import FaceDetector
+from inference import CLASSES, IMG_SIZE, crop_faces_uint8, default_model_path, load_backend, normalize_faces
+from model_manifest import read_manifest, verify_model
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Per-process state set by _init_worker
+_detector = None
+_crops_only = False
+
+
+def _init_worker(detection_scale, crops_only):
+    global _detector, _crops_only
+    cv2.setNumThreads(1)  # parallelism comes from the pool
+    _crops_only = crops_only
+    if not crops_only:
+        mode = "full" if detection_scale == 1.0 else "downscale"
+        _detector = FaceDetector(mode=mode, scale=detection_scale)
+
+
+def _faces_in(gray):
+    """
+    (boxes, uint8 crops) for one grayscale image, cut like the live app. The
+    crops go back to the parent as uint8 (a quarter of the float32 pickling
+    volume) and are normalised just before the model call.
+    """
+    if _crops_only:
+        h, w = gray.shape
+        boxes = [(0, 0, w, h)]
+    else:
+        boxes = [tuple(int(v) for v in box) for box in _detector.detect(gray)]
+    return boxes, crop_faces_uint8(gray, boxes)
+
+
+def _score_images(paths):
+    """Worker task: a chunk of image files -> (records, crops)."""
+    records, crops = [], []
+    for path in paths:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            continue
+        boxes, faces = _faces_in(gray)
+        records += [(path, 0, i, box) for i, box in enumerate(boxes)]
+        crops.append(faces)
+    return records, _stack(crops)
+
+
+def _score_video(task):
+    """Worker task: one segment of a video -> (records, crops)."""
+    path, start, stop, every = task
+    cap = cv2.VideoCapture(path)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    records, crops = [], []
+    frame_index = start - 1
+    # stop is None when the frame count is unknown: read to the end
+    while stop is None or frame_index + 1 < stop:
+        frame_index += 1
+        ok = cap.grab()
+        if not ok:
+            break
+        if frame_index % every:
+            continue
+        ok, frame = cap.retrieve()
+        if not ok:
+            break
+        boxes, faces = _faces_in(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        records += [(path, frame_index, i, box) for i, box in enumerate(boxes)]
+        crops.append(faces)
+    cap.release()
+    return records, _stack(crops)
+
+
+def _stack(crops):
+    if not crops:
+        return np.empty((0, IMG_SIZE, IMG_SIZE, 1), dtype=np.uint8)
+    return np.concatenate(crops)
+
+
+def image_tasks(input_dir, chunk_size):
+    paths = []
+    for root, _, files in os.walk(input_dir):
+        paths += [os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS)]
+    paths.sort()
+    return [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)], len(paths)
+
+
+def video_tasks(path, segment_frames, every):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"❌ Could not open video: {path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total <= 0:
+        # Some containers do not report a frame count; scan the whole file in one task
+        print("⚠️ Video reports no frame count; reading it sequentially in one task")
+        return [(path, 0, None, every)], None
+    return [(path, start, min(start + segment_frames, total), every)
+            for start in range(0, total, segment_frames)], total
+
+
+class ResultWriter:
+    """Streams rows to CSV, or collects them for a Parquet file written on close."""
+
+    def __init__(self, path, classes):
+        self.path = path
+        self.columns = ['source', 'frame', 'face', 'x', 'y', 'w', 'h', 'label',
+                        'emotion', 'confidence'] + [f'p_{c}' for c in classes]
+        self.parquet = path.lower().endswith('.parquet')
+        self._rows = []
+        if self.parquet:
+            # Fail before scoring rather than after
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                try:
+                    import fastparquet  # noqa: F401
+                except ImportError:
+                    raise SystemExit("❌ Parquet output needs pyarrow (pip install pyarrow); "
+                                     "or use a .csv output") from None
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._csv = csv.writer(self._file)
+            self._csv.writerow(self.columns)
+
+    def write(self, rows):
+        if self.parquet:
+            self._rows += rows
+        else:
+            self._csv.writerows(rows)
+
+    def close(self):
+        if self.parquet:
+            import pandas as pd
+            pd.DataFrame(self._rows, columns=self.columns).to_parquet(self.path, index=False)
+        else:
+            self._file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score an image folder or a video file in batches")
+    parser.add_argument('input', help="Directory of images or a video file")
+    parser.add_argument('--output', default='scores.csv', help=".csv or .parquet")
+    parser.add_argument('--model', default=None, help="Default: the GUI's model choice")
+    parser.add_argument('--crops', action='store_true',
+                        help="Images are already cropped faces; skip detection")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Detection processes (0: run in this process)")
+    parser.add_argument('--batch-size', type=int, default=1024, help="Faces per model call")
+    parser.add_argument('--chunk-size', type=int, default=64, help="Images per worker task")
+    parser.add_argument('--segment-frames', type=int, default=300, help="Video frames per worker task")
+    parser.add_argument('--every', type=int, default=1, help="Score every Nth video frame")
+    parser.add_argument('--detection-scale', type=float, default=1.0,
+                        help="Downscale factor before detection (1.0: full resolution)")
+    parser.add_argument('--threads', type=int, default=None, help="Inference threads (TFLite/ONNX)")
+    args = parser.parse_args()
+
+    model_path = args.model or default_model_path(os.path.join(script_dir, 'model'))
+    manifest = read_manifest(model_path)
+    classes = manifest['classes'] if manifest else CLASSES
+    backend = load_backend(model_path, num_threads=args.threads)
+    verify_model(model_path, classes, num_outputs=backend.num_classes)
+    print(f"✅ Model: {os.path.basename(model_path)}")
+
+    if os.path.isdir(args.input):
+        tasks, total = image_tasks(args.input, args.chunk_size)
+        worker, unit = _score_images, "images"
+    else:
+        if args.crops:
+            parser.error("--crops only applies to image folders")
+        tasks, total = video_tasks(args.input, args.segment_frames, max(1, args.every))
+        worker, unit = _score_video, "frames"
+    total = total if total is not None else "all"  # video without a frame count
+    print(f"Scoring {total} {unit} in {len(tasks)} tasks with {args.workers or 1} worker(s)...")
+
+    writer = ResultWriter(args.output, classes)
+    pending_records, pending_crops, pending_count = [], [], 0
+    faces = correct = labelled = 0
+    started = time.perf_counter()
+
+    def flush():
+        nonlocal faces, correct, labelled, pending_records, pending_crops, pending_count
+        batch = np.concatenate(pending_crops)
+        probs = np.concatenate([backend(normalize_faces(batch[i:i + args.batch_size]))
+                                for i in range(0, len(batch), args.batch_size)])
+        rows = []
+        for (source, frame, face, (x, y, w, h)), p in zip(pending_records, probs):
+            best = int(np.argmax(p))
+            label = os.path.basename(os.path.dirname(source)) if args.crops else ''
+            label = label if label in classes else ''
+            if label:
+                labelled += 1
+                correct += label == classes[best]
+            rows.append([source, frame, face, x, y, w, h, label, classes[best],
+                         round(float(p[best]), 4)] + [round(float(v), 4) for v in p])
+        writer.write(rows)
+        faces += len(rows)
+        pending_records, pending_crops, pending_count = [], [], 0
+
+    def consume(results):
+        nonlocal pending_records, pending_crops, pending_count
+        for records, crops in results:
+            if not len(records):
+                continue
+            pending_records += records
+            pending_crops.append(crops)
+            pending_count += len(records)
+            if pending_count >= args.batch_size:
+                flush()
+
+    initargs = (args.detection_scale, args.crops)
+    if args.workers and args.workers > 0:
+        # "spawn" keeps TensorFlow's threads out of the workers (and matches Windows)
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(args.workers, initializer=_init_worker, initargs=initargs) as pool:
+            # imap keeps the input order, so rows come out sorted by file/frame
+            consume(pool.imap(worker, tasks))
+    else:
+        _init_worker(*initargs)
+        consume(map(worker, tasks))
+    if pending_count:
+        flush()
+    writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {faces} faces from {total} {unit} in {elapsed:.1f}s "
+          f"({faces / elapsed if elapsed else 0:.0f} faces/sec) -> {args.output}")
+    if labelled:
+        print(f"🎯 Agreement with folder labels: {correct / labelled:.3f} ({labelled} labelled faces)")
+
+
+if __name__ == '__main__':
+    main()
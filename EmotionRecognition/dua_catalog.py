@@ -0,0 +1,85 @@
+"""
+Dua catalog loaded once from duas.json.
+
+Each emotion maps to an immutable, fully resolved dua entry, so a lookup is a
+single dictionary hit. The ``audio`` path of every entry is resolved up
+front against the audio directory. It is re-resolved only when that
+directory's mtime changes (a file was added or removed), and the mtime
+itself is checked at most once every ``recheck_interval`` seconds.
+"""
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "duas.json")
+
+
+class DuaCatalog:
+    def __init__(self, audio_dir, catalog_path=DEFAULT_CATALOG, recheck_interval=5.0):
+        self.audio_dir = audio_dir
+        self.recheck_interval = recheck_interval
+
+        with open(catalog_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._raw = {emotion.lower(): entry for emotion, entry in data["emotions"].items()}
+        self._raw_fallback = data["fallback"]
+
+        self._lock = threading.Lock()
+        self._audio_mtime = None
+        self._next_check = 0.0
+        self._entries = {}
+        self._fallback = None
+        self._resolve()
+
+    @property
+    def emotions(self):
+        return tuple(self._raw)
+
+    @property
+    def audio_files(self):
+        """Paths of all recitations that exist, each listed once."""
+        entries = list(self._entries.values()) + [self._fallback]
+        return list(dict.fromkeys(e["audio"] for e in entries if e["audio"]))
+
+    def get(self, emotion):
+        """Return the (read-only) dua entry for an emotion, or the general fallback."""
+        if time.monotonic() >= self._next_check:
+            self._maybe_refresh_audio()
+        return self._entries.get((emotion or "").lower(), self._fallback)
+
+    # --------------------------------------------------
+    def _audio_dir_mtime(self):
+        try:
+            return os.stat(self.audio_dir).st_mtime
+        except OSError:
+            return None
+
+    def _maybe_refresh_audio(self):
+        with self._lock:
+            self._next_check = time.monotonic() + self.recheck_interval
+            if self._audio_dir_mtime() != self._audio_mtime:
+                self._resolve()
+
+    def _resolve(self):
+        """Build the immutable entries with audio paths for files that exist."""
+        self._audio_mtime = self._audio_dir_mtime()
+        try:
+            available = set(os.listdir(self.audio_dir))
+        except OSError:
+            available = set()
+
+        def build(entry):
+            entry = dict(entry)
+            audio_file = entry.pop("audio_file", None)
+            entry["audio"] = (
+                os.path.join(self.audio_dir, audio_file)
+                if audio_file and audio_file in available else None
+            )
+            return MappingProxyType(entry)
+
+        # Swap whole dicts so concurrent readers never see a half-built catalog
+        self._entries = {emotion: build(entry) for emotion, entry in self._raw.items()}
+        self._fallback = build(self._raw_fallback)
+        self._next_check = time.monotonic() + self.recheck_interval
@@ -0,0 +1,186 @@
+"""
+Temporal smoothing of per-frame emotion predictions.
+
+The raw argmax of a single frame flickers between classes. Each tracked
+face keeps a ring buffer of its recent probability vectors, smoothed with an
+exponential moving average (or a majority vote over the buffer). The stable
+emotion only switches when another class leads it by a hysteresis margin,
+and a change event is reported only when that stable emotion changes.
+"""
+from collections import deque
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """Intersection-over-union of two (x, y, w, h) boxes."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+class EmotionSmoother:
+    """Stable emotion for a single face."""
+
+    def __init__(self, classes, window=8, alpha=0.3, hysteresis=0.15,
+                 min_frames=3, method="ema"):
+        if method not in ("ema", "vote"):
+            raise ValueError(f"Unknown smoothing method: {method}")
+        self.classes = list(classes)
+        self.alpha = alpha
+        self.hysteresis = hysteresis
+        self.min_frames = min_frames
+        self.method = method
+
+        self.history = deque(maxlen=window)
+        self.ema = None
+        self.stable = None  # index into classes
+
+    @property
+    def emotion(self):
+        return None if self.stable is None else self.classes[self.stable]
+
+    def scores(self):
+        """Smoothed per-class scores (sum to 1)."""
+        if self.method == "ema":
+            return self.ema
+        votes = np.bincount(
+            [int(np.argmax(p)) for p in self.history], minlength=len(self.classes)
+        )
+        return votes / max(len(self.history), 1)
+
+    def update(self, probs):
+        """Add one probability vector. Returns the new stable emotion if it changed."""
+        probs = np.asarray(probs, dtype=np.float32)
+        self.history.append(probs)
+        if self.ema is None:
+            self.ema = probs.copy()
+        else:
+            self.ema = self.alpha * probs + (1.0 - self.alpha) * self.ema
+
+        if len(self.history) < self.min_frames:
+            return None
+
+        scores = self.scores()
+        best = int(np.argmax(scores))
+        if self.stable is None:
+            self.stable = best
+            return self.emotion
+        if best != self.stable and scores[best] - scores[self.stable] >= self.hysteresis:
+            self.stable = best
+            return self.emotion
+        return None
+
+
+class EmotionTracker:
+    """
+    Keeps one EmotionSmoother per face across frames.
+
+    Faces are matched to existing tracks by box overlap. The largest face is
+    treated as the primary one; ``update`` returns its stable emotion whenever
+    that changes, and None otherwise.
+    """
+
+    def __init__(self, classes, iou_threshold=0.3, max_missed=10, **smoother_kwargs):
+        self.classes = list(classes)
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.smoother_kwargs = smoother_kwargs
+
+        self.tracks = {}  # id -> {"box", "smoother", "missed"}
+        self._next_id = 1
+        self.primary_emotion = None
+
+    def reset(self):
+        self.tracks = {}
+        self.primary_emotion = None
+
+    def update(self, boxes, probs):
+        """
+        Feed the faces of one frame.
+
+        Returns ``(faces, changed)`` where ``faces`` lists a dict per input box
+        with the track id and smoothed emotion, and ``changed`` is the primary
+        face's new stable emotion (or None if nothing changed).
+        """
+        unmatched = set(self.tracks)
+        faces = []
+        for box, p in zip(boxes, probs):
+            box = tuple(int(v) for v in box)
+            track_id = self._match(box, unmatched)
+            if track_id is None:
+                track_id = self._next_id
+                self._next_id += 1
+                self.tracks[track_id] = {
+                    "smoother": EmotionSmoother(self.classes, **self.smoother_kwargs),
+                }
+            else:
+                unmatched.discard(track_id)
+
+            track = self.tracks[track_id]
+            track["box"] = box
+            track["missed"] = 0
+            track["confidence"] = float(np.max(p))
+            track["smoother"].update(p)
+            faces.append({
+                "track_id": track_id,
+                "box": box,
+                "emotion": track["smoother"].emotion,
+                "confidence": track["confidence"],
+            })
+
+        for track_id in unmatched:
+            self.tracks[track_id]["missed"] += 1
+            if self.tracks[track_id]["missed"] > self.max_missed:
+                del self.tracks[track_id]
+
+        changed = None
+        primary = self._primary(faces)
+        if primary is not None and primary["emotion"] != self.primary_emotion:
+            self.primary_emotion = primary["emotion"]
+            changed = self.primary_emotion
+        return faces, changed
+
+    def follow(self, boxes):
+        """
+        Move existing tracks to new box positions without a new prediction.
+
+        Used on frames where faces were only tracked, not classified; the last
+        smoothed emotion of each matched track is reused.
+        """
+        unmatched = set(self.tracks)
+        faces = []
+        for box in boxes:
+            box = tuple(int(v) for v in box)
+            track_id = self._match(box, unmatched)
+            if track_id is None:
+                continue
+            unmatched.discard(track_id)
+            track = self.tracks[track_id]
+            track["box"] = box
+            faces.append({
+                "track_id": track_id,
+                "box": box,
+                "emotion": track["smoother"].emotion,
+                "confidence": track.get("confidence", 0.0),
+            })
+        return faces
+
+    def _match(self, box, candidates):
+        best_id, best_iou = None, self.iou_threshold
+        for track_id in candidates:
+            iou = box_iou(box, self.tracks[track_id]["box"])
+            if iou >= best_iou:
+                best_id, best_iou = track_id, iou
+        return best_id
+
+    @staticmethod
+    def _primary(faces):
+        settled = [f for f in faces if f["emotion"] is not None]
+        if not settled:
+            return None
+        return max(settled, key=lambda f: f["box"][2] * f["box"][3])
@@ -0,0 +1,148 @@
+"""
+GUI-free core of the emotion -> dua pipeline.
+
+    RecommendationEngine   dua catalog + text classifier (keywords, then the
+                           learned text model); text -> emotion -> dua
+    FaceScorer             image bytes -> faces with class probabilities, all
+                           faces of a whole batch of images in one model call
+
+The GUI (ui/main_ui.py) and the HTTP service (service.py) both build on
+these. FaceScorer loads the image model, so the service keeps one per
+worker process; RecommendationEngine is cheap and lives wherever the
+answers are assembled.
+"""
+import os
+
+import cv2
+import numpy as np
+
+from dua_catalog import DuaCatalog
+from face_detection import FaceDetector
+from inference import CLASSES, crop_faces, default_model_path, load_backend, warm_up
+from model_manifest import verify_model
+from text_emotion import TextEmotionClassifier
+from text_model import DEFAULT_TEXT_MODEL, TextEmotionModel
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_AUDIO_DIR = os.path.join(os.path.dirname(script_dir), 'audio')
+DEFAULT_MODEL_DIR = os.path.join(script_dir, 'model')
+
+
+def load_text_model(path=DEFAULT_TEXT_MODEL, classes=CLASSES):
+    """The learned text model, or None (keywords only) if it is missing or does not match."""
+    if not os.path.exists(path):
+        return None
+    try:
+        verify_model(path, classes)
+        return TextEmotionModel.load(path)
+    except Exception as e:
+        print(f"⚠️ Text model not used, keywords only: {e}")
+        return None
+
+
+class RecommendationEngine:
+    def __init__(self, audio_dir=DEFAULT_AUDIO_DIR, classes=CLASSES, text_model_path=DEFAULT_TEXT_MODEL):
+        self.classes = list(classes)
+        # Duas are loaded once from EmotionRecognition/duas.json
+        self.dua_catalog = DuaCatalog(audio_dir)
+        # Keyword index compiled once from text_emotion_lexicon.json, with the
+        # small learned text model (milliseconds to load) for texts without keywords
+        self.text_classifier = TextEmotionClassifier(model=load_text_model(text_model_path, self.classes))
+
+    def dua_for(self, emotion):
+        """Read-only dua entry for an emotion (the general fallback if unknown)."""
+        return self.dua_catalog.get(emotion)
+
+    def text_emotion(self, text):
+        return self.text_classifier.classify(text)
+
+    def text_emotions(self, texts):
+        return self.text_classifier.classify_batch(texts)
+
+    def recommend(self, emotion, **details):
+        """JSON-ready answer: the emotion, its dua (audio as a file name) and ``details``."""
+        dua = dict(self.dua_for(emotion))
+        dua["audio"] = os.path.basename(dua["audio"]) if dua.get("audio") else None
+        return {"emotion": emotion, "dua": dua, **details}
+
+    def recommend_text(self, text):
+        return self.recommend(self.text_emotion(text))
+
+    def recommend_texts(self, texts):
+        return [self.recommend(emotion) for emotion in self.text_emotions(texts)]
+
+    def recommend_faces(self, faces):
+        """Recommendation for one scored image: the largest face decides the emotion."""
+        if faces is None:
+            return {"error": "could not decode image"}
+        if not faces:
+            return {"emotion": None, "dua": None, "faces": []}
+        main_face = max(faces, key=lambda f: f["box"][2] * f["box"][3])
+        return self.recommend(main_face["emotion"], faces=faces)
+
+
+def _decode_gray(data):
+    """Grayscale image from encoded bytes, or None; a bad image never fails its batch."""
+    if not data:
+        return None
+    try:
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    except cv2.error:
+        return None
+
+
+class FaceScorer:
+    def __init__(self, model_path=None, classes=CLASSES, detection_scale=1.0, num_threads=None):
+        self.model_path = model_path or default_model_path(DEFAULT_MODEL_DIR)
+        self.classes = list(classes)
+        self.backend = load_backend(self.model_path, num_threads=num_threads)
+        verify_model(self.model_path, self.classes, num_outputs=self.backend.num_classes)
+        warm_up(self.backend)
+        mode = "full" if detection_scale == 1.0 else "downscale"
+        self.detector = FaceDetector(mode=mode, scale=detection_scale)
+
+    def score(self, images, detect=True):
+        """
+        Per image (encoded bytes): a list of faces ``{"box", "emotion",
+        "confidence", "probabilities"}``, or None if it could not be decoded.
+        With ``detect=False`` every image is taken as one cropped face;
+        ``detect`` can also be given per image.
+        """
+        if isinstance(detect, bool):
+            detect = [detect] * len(images)
+        grays, boxes = [], []
+        for data, find_faces in zip(images, detect):
+            gray = _decode_gray(data)
+            if gray is None:
+                grays.append(None)
+                boxes.append([])
+                continue
+            if find_faces:
+                faces = [tuple(int(v) for v in box) for box in self.detector.detect(gray)]
+            else:
+                faces = [(0, 0, gray.shape[1], gray.shape[0])]
+            grays.append(gray)
+            boxes.append(faces)
+
+        # Every face of every image goes through the model in one batch
+        crops = [crop_faces(gray, faces) for gray, faces in zip(grays, boxes) if faces]
+        probs = self.backend(np.concatenate(crops)) if crops else None
+
+        results, offset = [], 0
+        for gray, faces in zip(grays, boxes):
+            if gray is None:
+                results.append(None)
+                continue
+            scored = []
+            for box, p in zip(faces, probs[offset:offset + len(faces)] if faces else ()):
+                best = int(np.argmax(p))
+                scored.append({
+                    "box": list(box),
+                    "emotion": self.classes[best],
+                    "confidence": round(float(p[best]), 4),
+                    "probabilities": {c: round(float(v), 4) for c, v in zip(self.classes, p)},
+                })
+            offset += len(faces)
+            results.append(scored)
+        return results
@@ -0,0 +1,87 @@
+"""
+Haar cascade face detection with cheaper search modes.
+
+Modes:
+    "full"       scan the whole full-resolution frame (original behaviour)
+    "downscale"  scan the whole frame after shrinking it by ``scale``
+    "roi"        scan only padded regions around the last known faces, also
+                 downscaled; falls back to a downscaled full scan when there
+                 are no known faces and every ``full_scan_interval`` calls so
+                 new faces are still picked up
+
+Boxes are always returned in full-resolution coordinates, so the 48x48 crop
+is still cut from the full-resolution frame. The default cascade cannot see
+faces smaller than 24x24 pixels after downscaling, so keep ``scale`` at 2-4.
+"""
+import cv2
+
+from emotion_smoothing import box_iou
+
+DEFAULT_CASCADE = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+
+
+class FaceDetector:
+    MODES = ("full", "downscale", "roi")
+
+    def __init__(self, mode="roi", scale=2.0, roi_padding=0.5, full_scan_interval=4,
+                 scale_factor=1.1, min_neighbors=4, min_size=None, max_size=None,
+                 cascade_path=DEFAULT_CASCADE):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown detection mode: {mode} (choose from {self.MODES})")
+        self.mode = mode
+        self.scale = scale if mode != "full" else 1.0
+        self.roi_padding = roi_padding
+        self.full_scan_interval = full_scan_interval
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+        self.max_size = max_size
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+
+        self._calls = 0
+
+    def detect(self, gray, hints=None):
+        """Return face boxes (x, y, w, h) for a grayscale frame.
+
+        ``hints`` are the last known face boxes; only "roi" mode uses them.
+        """
+        self._calls += 1
+        if self.mode == "roi" and hints and self._calls % self.full_scan_interval:
+            return self._detect_regions(gray, hints)
+        return self._detect_in(gray, 0, 0)
+
+    # --------------------------------------------------
+    def _detect_in(self, gray, offset_x, offset_y):
+        """Detect in ``gray`` (a full-res frame or crop) and map boxes back."""
+        if self.scale != 1.0:
+            small = cv2.resize(gray, None, fx=1.0 / self.scale, fy=1.0 / self.scale,
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+
+        kwargs = {"scaleFactor": self.scale_factor, "minNeighbors": self.min_neighbors}
+        if self.min_size:
+            kwargs["minSize"] = tuple(max(int(v / self.scale), 1) for v in self.min_size)
+        if self.max_size:
+            kwargs["maxSize"] = tuple(int(v / self.scale) for v in self.max_size)
+
+        boxes = []
+        for (x, y, w, h) in self.cascade.detectMultiScale(small, **kwargs):
+            boxes.append((
+                int(x * self.scale) + offset_x, int(y * self.scale) + offset_y,
+                int(w * self.scale), int(h * self.scale),
+            ))
+        return boxes
+
+    def _detect_regions(self, gray, hints):
+        frame_h, frame_w = gray.shape[:2]
+        boxes = []
+        for (x, y, w, h) in hints:
+            px, py = int(w * self.roi_padding), int(h * self.roi_padding)
+            x0, y0 = max(x - px, 0), max(y - py, 0)
+            x1, y1 = min(x + w + px, frame_w), min(y + h + py, frame_h)
+            for box in self._detect_in(gray[y0:y1, x0:x1], x0, y0):
+                # Padded regions of neighbouring faces can overlap
+                if all(box_iou(box, kept) < 0.3 for kept in boxes):
+                    boxes.append(box)
+        return boxes
@@ -0,0 +1,113 @@
+"""
+Skip-frame face detection.
+
+The Haar cascade is the most expensive step of the live loop, so it only
+runs every ``interval`` frames. In between, faces found by the last
+detection are followed with template matching on a downscaled frame. A
+detection is forced early whenever a track's match score drops below
+``min_confidence``.
+
+Between detections the tracked boxes keep the order of the last detection,
+so callers can reuse the classification made on that detection frame.
+"""
+import cv2
+
+
+class TemplateFaceTracker:
+    """Follows face boxes by matching their detection-time templates."""
+
+    def __init__(self, scale=0.5, search_margin=0.5):
+        self.scale = scale
+        self.search_margin = search_margin
+        self._templates = []  # (template, (x, y, w, h) in downscaled coords)
+
+    def _downscale(self, gray):
+        if self.scale == 1.0:
+            return gray
+        return cv2.resize(gray, None, fx=self.scale, fy=self.scale,
+                          interpolation=cv2.INTER_AREA)
+
+    def init(self, gray, boxes):
+        """Take new templates from the frame the boxes were detected in."""
+        small = self._downscale(gray)
+        self._templates = []
+        for (x, y, w, h) in boxes:
+            sx, sy = int(x * self.scale), int(y * self.scale)
+            sw, sh = max(int(w * self.scale), 1), max(int(h * self.scale), 1)
+            template = small[sy:sy + sh, sx:sx + sw].copy()
+            self._templates.append((template, (sx, sy, sw, sh)))
+
+    def track(self, gray):
+        """Return (boxes, scores) for every template, in full-resolution coordinates."""
+        small = self._downscale(gray)
+        frame_h, frame_w = small.shape[:2]
+        boxes, scores = [], []
+
+        for i, (template, (sx, sy, sw, sh)) in enumerate(self._templates):
+            mx, my = int(sw * self.search_margin), int(sh * self.search_margin)
+            x0, y0 = max(sx - mx, 0), max(sy - my, 0)
+            x1, y1 = min(sx + sw + mx, frame_w), min(sy + sh + my, frame_h)
+            region = small[y0:y1, x0:x1]
+
+            th, tw = template.shape[:2]
+            if region.shape[0] < th or region.shape[1] < tw or tw < 4 or th < 4:
+                score, (nx, ny) = 0.0, (sx, sy)
+            else:
+                result = cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED)
+                _, score, _, (lx, ly) = cv2.minMaxLoc(result)
+                nx, ny = x0 + lx, y0 + ly
+
+            self._templates[i] = (template, (nx, ny, sw, sh))
+            boxes.append((
+                int(nx / self.scale), int(ny / self.scale),
+                int(sw / self.scale), int(sh / self.scale),
+            ))
+            scores.append(float(score))
+
+        return boxes, scores
+
+
+class DetectionScheduler:
+    """
+    Runs ``detect_fn`` every ``interval`` frames and tracks faces in between.
+
+    ``detect_fn(gray, hints)`` receives the last known boxes as hints, which
+    ``FaceDetector.detect`` uses to restrict its search.
+    """
+
+    def __init__(self, detect_fn, interval=5, min_confidence=0.6, tracker=None):
+        self.detect_fn = detect_fn
+        self.interval = interval
+        self.min_confidence = min_confidence
+        self.tracker = tracker or TemplateFaceTracker()
+
+        self.boxes = []
+        self._since_detect = None
+
+    def reset(self):
+        self.boxes = []
+        self._since_detect = None
+
+    def process(self, gray):
+        """
+        Return ``(boxes, detected)`` for one grayscale frame.
+
+        ``detected`` is True when the cascade ran on this frame, False when the
+        boxes come from the tracker (same count and order as the last detection).
+        """
+        if self._since_detect is not None and self._since_detect < self.interval:
+            if not self.boxes:
+                self._since_detect += 1
+                return [], False
+
+            boxes, scores = self.tracker.track(gray)
+            if min(scores) >= self.min_confidence:
+                self._since_detect += 1
+                self.boxes = boxes
+                return boxes, False
+
+        boxes = [tuple(int(v) for v in box) for box in self.detect_fn(gray, self.boxes)]
+        self.tracker.init(gray, boxes)
+        self.boxes = boxes
+        self._since_detect = 1
+        return boxes, True
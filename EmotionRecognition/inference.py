@@ -0,0 +1,200 @@
+"""
+Batched emotion inference shared by the GUI and the webcam script.
+
+All faces found in a frame are stacked into one (N, 48, 48, 1) tensor and
+run through the model with a single call instead of one ``model.predict``
+per face.
+
+The model can be served by different backends, all with the same call
+signature ``backend(batch) -> (N, num_classes) probabilities``:
+
+    KerasBackend   the trained .h5 model through a compiled tf.function
+    TFLiteBackend  an exported .tflite model (tflite_runtime or tf.lite),
+                   run by the XNNPACK CPU delegate; full-integer (int8)
+                   models are quantized/dequantized at the boundary
+    ONNXBackend    an exported .onnx model through onnxruntime
+
+Use ``load_backend(path)`` to pick one from the file extension.
+"""
+import os
+
+import cv2
+import numpy as np
+
+IMG_SIZE = 48
+# Output order of every emotion model (image and text); the manifests record the same list
+CLASSES = ['angry', 'happy', 'neutral', 'sad', 'surprise']
+# Largest held-out accuracy loss (float32 - int8) for which the int8 model is picked by default
+MAX_INT8_ACCURACY_DROP = 0.02
+
+
+def crop_faces_uint8(gray, faces):
+    """Cut and resize every face box into one (N, 48, 48, 1) uint8 batch (not yet normalised)."""
+    batch = np.empty((len(faces), IMG_SIZE, IMG_SIZE, 1), dtype=np.uint8)
+    for i, (x, y, w, h) in enumerate(faces):
+        roi = gray[y:y + h, x:x + w]
+        batch[i, :, :, 0] = cv2.resize(roi, (IMG_SIZE, IMG_SIZE))
+    return batch
+
+
+def normalize_faces(batch):
+    """uint8 face batch -> float32 in [0, 1], the model input."""
+    return np.multiply(batch, np.float32(1.0 / 255.0), dtype=np.float32)
+
+
+def crop_faces(gray, faces):
+    """Cut, resize and normalise every face box into one (N, 48, 48, 1) float32 batch."""
+    return normalize_faces(crop_faces_uint8(gray, faces))
+
+
+class KerasBackend:
+    """Callable that returns class probabilities for a whole batch of faces."""
+
+    def __init__(self, model):
+        import tensorflow as tf
+
+        self.model = model
+        self.num_classes = int(model.output_shape[-1])
+        # One trace for every batch size; avoids predict()'s per-call data adapter setup
+        self._forward = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([None, IMG_SIZE, IMG_SIZE, 1], tf.float32)],
+        )
+
+    @classmethod
+    def from_path(cls, path):
+        from tensorflow.keras.models import load_model
+
+        return cls(load_model(path, compile=False))
+
+    def __call__(self, batch):
+        if len(batch) == 0:
+            return np.empty((0, self.num_classes), dtype=np.float32)
+        return self._forward(batch).numpy()
+
+
+class TFLiteBackend:
+    """Runs an exported .tflite model, float or full-integer quantized."""
+
+    def __init__(self, path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(
+            model_path=path, num_threads=num_threads or os.cpu_count()
+        )
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.num_classes = int(self._output["shape"][-1])
+        self._batch_size = int(self._input["shape"][0])
+
+    def _resize(self, batch_size):
+        # Re-allocating is only needed when the number of faces changes
+        if batch_size != self._batch_size:
+            self.interpreter.resize_tensor_input(
+                self._input["index"], [batch_size, IMG_SIZE, IMG_SIZE, 1]
+            )
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch_size = batch_size
+
+    def __call__(self, batch):
+        if len(batch) == 0:
+            return np.empty((0, self.num_classes), dtype=np.float32)
+        self._resize(len(batch))
+        self.interpreter.set_tensor(self._input["index"], self._quantize(batch))
+        self.interpreter.invoke()
+        return self._dequantize(self.interpreter.get_tensor(self._output["index"]))
+
+    def _quantize(self, batch):
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, output):
+        if self._output["dtype"] == np.float32:
+            return output.copy()
+        scale, zero_point = self._output["quantization"]
+        return (output.astype(np.float32) - zero_point) * scale
+
+
+class ONNXBackend:
+    """Runs an exported .onnx model through onnxruntime on the CPU."""
+
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_name = self.session.get_inputs()[0].name
+        self.num_classes = int(self.session.get_outputs()[0].shape[-1])
+
+    def __call__(self, batch):
+        if len(batch) == 0:
+            return np.empty((0, self.num_classes), dtype=np.float32)
+        return self.session.run(None, {self._input_name: batch.astype(np.float32, copy=False)})[0]
+
+
+def warm_up(backend):
+    """Run one dummy batch so graph tracing and kernel setup happen up front."""
+    return backend(np.zeros((1, IMG_SIZE, IMG_SIZE, 1), dtype=np.float32))
+
+
+def load_backend(path, num_threads=None):
+    """Create the inference backend matching the model file's extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".tflite":
+        return TFLiteBackend(path, num_threads=num_threads)
+    if ext == ".onnx":
+        return ONNXBackend(path, num_threads=num_threads)
+    if ext in (".h5", ".keras"):
+        return KerasBackend.from_path(path)
+    raise ValueError(f"Unsupported model format: {path}")
+
+
+def default_model_path(model_dir):
+    """
+    Pick the model artifact to serve from ``model_dir``.
+
+    ``EMOTION_MODEL`` overrides the choice. Otherwise an int8
+    emotion_model_int8.tflite is preferred, then a float
+    emotion_model.tflite, as long as it is not older than emotion_model.h5
+    (i.e. the model was not retrained since the export). The int8 model is
+    only picked if quantize_model.py measured its accuracy on the held-out
+    split and it costs at most ``MAX_INT8_ACCURACY_DROP``.
+    """
+    override = os.environ.get("EMOTION_MODEL")
+    if override:
+        return override
+
+    keras_path = os.path.join(model_dir, "emotion_model.h5")
+    keras_mtime = os.path.getmtime(keras_path) if os.path.exists(keras_path) else 0
+    for name in ("emotion_model_int8.tflite", "emotion_model.tflite"):
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path) and os.path.getmtime(path) >= keras_mtime:
+            if name == "emotion_model_int8.tflite" and not _int8_accuracy_ok(path):
+                continue
+            return path
+    return keras_path
+
+
+def _int8_accuracy_ok(path):
+    from model_manifest import read_manifest
+
+    quantization = (read_manifest(path) or {}).get("quantization") or {}
+    if quantization.get("evaluated_on") != "holdout" or "accuracy_drop" not in quantization:
+        return False
+    return quantization["accuracy_drop"] <= MAX_INT8_ACCURACY_DROP
@@ -0,0 +1,134 @@
+"""
+Load test for service.py on localhost.
+
+    python load_test.py --endpoint text --requests 5000 --concurrency 64
+    python load_test.py --endpoint image --image face.jpg --requests 1000 --concurrency 32
+    python load_test.py --endpoint batch --image face.jpg --batch-texts 100 --batch-images 8
+
+Every concurrent client keeps one keep-alive connection open and sends its
+requests back to back. Reported: requests/sec, p50/p95/p99 latency, errors,
+and the service's micro-batching statistics from /health.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+SAMPLE_TEXTS = [
+    "I am so frustrated with work today",
+    "feeling grateful for my family",
+    "nothing much happened, just a normal day",
+    "I miss my father so much",
+    "wow, I did not expect that at all",
+    "I'm not happy about how things turned out",
+    "my exam got cancelled at the last minute",
+    "I'm fed up with everyone ignoring me",
+]
+
+
+async def request(reader, writer, host, method, path, body=b"", content_type="application/json"):
+    head = (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+    status_line, *header_lines = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    payload = await reader.readexactly(int(headers.get("content-length", 0)))
+    return int(status_line.split(" ")[1]), payload
+
+
+def build_request(args, image, i):
+    """(method, path, body, content type) of the i-th request."""
+    if args.endpoint == "text":
+        body = json.dumps({"text": SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]}).encode("utf-8")
+        return "POST", "/v1/text", body, "application/json"
+    if args.endpoint == "image":
+        path = "/v1/image" if args.detect else "/v1/image?detect=0"
+        return "POST", path, image, "image/jpeg"
+    encoded = base64.b64encode(image).decode("ascii") if image else None
+    body = json.dumps({
+        "texts": [SAMPLE_TEXTS[(i + k) % len(SAMPLE_TEXTS)] for k in range(args.batch_texts)],
+        "images": [encoded] * (args.batch_images if encoded else 0),
+        "detect": args.detect,
+    }).encode("utf-8")
+    return "POST", "/v1/batch", body, "application/json"
+
+
+async def client(args, url, image, counter, latencies, errors):
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    try:
+        while True:
+            i = counter[0]
+            if i >= args.requests:
+                return
+            counter[0] += 1
+            method, path, body, content_type = build_request(args, image, i)
+            started = time.perf_counter()
+            try:
+                status, payload = await request(reader, writer, url.netloc, method, path, body, content_type)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                errors.append(str(e))
+                return
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            if status != 200:
+                errors.append(f"{status}: {payload[:200].decode('utf-8', 'replace')}")
+    finally:
+        writer.close()
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    image = None
+    if args.image:
+        with open(args.image, "rb") as f:
+            image = f.read()
+    elif args.endpoint == "image":
+        raise SystemExit("❌ --image is required for the image endpoint")
+
+    counter, latencies, errors = [0], [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(args, url, image, counter, latencies, errors)
+                           for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    print(f"\n📊 {args.endpoint}: {len(latencies)} requests in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} requests/sec, concurrency {args.concurrency})")
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"   latency p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms")
+    if errors:
+        print(f"⚠️ {len(errors)} errors, e.g. {errors[0]}")
+
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    _, payload = await request(reader, writer, url.netloc, "GET", "/health")
+    writer.close()
+    health = json.loads(payload)
+    print(f"   service: {health['images']} images in {health['image_batches']} batches "
+          f"(mean batch {health['mean_batch_size']}), {health['workers']} workers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local emotion service")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--endpoint', choices=['text', 'image', 'batch'], default='text')
+    parser.add_argument('--image', default=None, help="Image file sent to the image/batch endpoints")
+    parser.add_argument('--no-detect', dest='detect', action='store_false',
+                        help="Send images as already cropped faces")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--batch-texts', type=int, default=50, help="Texts per batch request")
+    parser.add_argument('--batch-images', type=int, default=4, help="Images per batch request")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
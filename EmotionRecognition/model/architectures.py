@@ -0,0 +1,58 @@
+"""
+Named CNN presets for train_model.py.
+
+    standard   3 conv blocks + Dropout (model/train_model.py's original network)
+    compact    2 conv blocks, no Dropout (the network predict.py used to train)
+
+Both take 48x48 grayscale input in [0, 1] and end in a float32 softmax, so
+they stay numerically stable under mixed precision.
+"""
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import Conv2D, MaxPooling2D, Dense, Flatten, Dropout
+
+IMG_SIZE = 48
+DEFAULT_ARCHITECTURE = 'standard'
+
+
+def standard(num_classes):
+    return Sequential([
+        Conv2D(32, (3,3), activation='relu', input_shape=(IMG_SIZE, IMG_SIZE, 1)),
+        MaxPooling2D(2,2),
+
+        Conv2D(64, (3,3), activation='relu'),
+        MaxPooling2D(2,2),
+
+        Conv2D(128, (3,3), activation='relu'),
+        MaxPooling2D(2,2),
+
+        Flatten(),
+        Dense(128, activation='relu'),
+        Dropout(0.5),
+        Dense(num_classes, activation='softmax', dtype='float32')
+    ])
+
+
+def compact(num_classes):
+    return Sequential([
+        Conv2D(32, (3,3), activation='relu', input_shape=(IMG_SIZE, IMG_SIZE, 1)),
+        MaxPooling2D((2,2)),
+        Conv2D(64, (3,3), activation='relu'),
+        MaxPooling2D((2,2)),
+        Flatten(),
+        Dense(128, activation='relu'),
+        Dense(num_classes, activation='softmax', dtype='float32')
+    ])
+
+
+ARCHITECTURES = {
+    'standard': standard,
+    'compact': compact,
+}
+
+
+def build_model(architecture, num_classes):
+    try:
+        return ARCHITECTURES[architecture](num_classes)
+    except KeyError:
+        raise ValueError(f"Unknown architecture: {architecture} "
+                         f"(choose from {', '.join(ARCHITECTURES)})") from None
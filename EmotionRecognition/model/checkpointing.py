@@ -0,0 +1,119 @@
+"""
+Resumable training state for train_model.py.
+
+    <dir>/ckpt-N.*            latest weights + optimizer state + epoch (tf.train.Checkpoint)
+    <dir>/best.weights.h5     weights of the best epoch so far (lowest val_loss)
+    <dir>/best.json           {"val_loss", "epoch", "metrics"} of those weights
+    <dir>/run.json            what the run trains on (dataset hash, architecture,
+                              batch size)
+
+Checkpoints are written every ``every`` epochs and on interruption, so a
+crashed run resumes from the last finished epoch. The best weights survive
+resumes too, which is what gets exported at the end. A checkpoint is only
+resumed by a run with the same run.json; anything else starts fresh.
+train_model.py clears the directory once the model has been exported.
+"""
+import json
+import math
+import os
+import shutil
+
+import tensorflow as tf
+
+
+class TrainingCheckpoint(tf.keras.callbacks.Callback):
+    def __init__(self, directory, every=1, max_to_keep=2, monitor='val_loss', run_info=None):
+        super().__init__()
+        self.directory = directory
+        self.run_info = run_info or {}
+        self._run_info_path = os.path.join(directory, 'run.json')
+        self.every = max(1, every)
+        self.max_to_keep = max_to_keep
+        self.monitor = monitor
+        self.best_path = os.path.join(directory, 'best.weights.h5')
+        self._best_info_path = os.path.join(directory, 'best.json')
+        self.best = math.inf
+        self.best_epoch = None
+        self.best_metrics = {}
+        self._epoch = tf.Variable(0, trainable=False, dtype=tf.int64)
+        self._manager = None
+
+    def _attach(self, model):
+        if self._manager is None:
+            checkpoint = tf.train.Checkpoint(model=model, optimizer=model.optimizer, epoch=self._epoch)
+            self._manager = tf.train.CheckpointManager(checkpoint, self.directory, self.max_to_keep)
+
+    def restore(self, model):
+        """Load the latest checkpoint into a compiled model; returns the epoch to resume from."""
+        stale = self._stale_reason()
+        if stale:
+            print(f"🧹 Not resuming from {self.directory}: {stale}; starting fresh")
+            clear_checkpoints(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._run_info_path, 'w', encoding='utf-8') as f:
+            json.dump(self.run_info, f, indent=2)
+        self._attach(model)
+        if os.path.exists(self._best_info_path):
+            with open(self._best_info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            self.best, self.best_epoch = info[self.monitor], info['epoch']
+            self.best_metrics = info.get('metrics', {})
+        if not self._manager.latest_checkpoint:
+            return 0
+        # Optimizer slots are created lazily, so their values are restored on first use
+        self._manager.checkpoint.restore(self._manager.latest_checkpoint).expect_partial()
+        print(f"🔁 Resuming from {self._manager.latest_checkpoint} (epoch {int(self._epoch.numpy())})")
+        return int(self._epoch.numpy())
+
+    def _stale_reason(self):
+        """Why the existing checkpoints belong to a different run (None if they match)."""
+        if not os.path.isdir(self.directory) or not os.listdir(self.directory):
+            return None
+        if not os.path.exists(self._run_info_path):
+            return "checkpoints were written without run information"
+        with open(self._run_info_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        changed = [key for key in sorted(set(saved) | set(self.run_info))
+                   if saved.get(key) != self.run_info.get(key)]
+        if changed:
+            return f"{', '.join(changed)} changed since they were written"
+        return None
+
+    def save(self):
+        path = self._manager.save(checkpoint_number=int(self._epoch.numpy()))
+        print(f"💾 Checkpoint saved: {path}")
+
+    def on_train_begin(self, logs=None):
+        os.makedirs(self.directory, exist_ok=True)
+        self._attach(self.model)
+
+    def on_epoch_end(self, epoch, logs=None):
+        self._epoch.assign(epoch + 1)
+        current = (logs or {}).get(self.monitor)
+        if current is not None and current < self.best:
+            self.best, self.best_epoch = float(current), epoch + 1
+            self.best_metrics = {k: round(float(v), 4) for k, v in logs.items()}
+            self.model.save_weights(self.best_path)
+            with open(self._best_info_path, 'w', encoding='utf-8') as f:
+                json.dump({self.monitor: self.best, 'epoch': self.best_epoch,
+                           'metrics': self.best_metrics}, f)
+        if (epoch + 1) % self.every == 0:
+            self.save()
+
+    def on_train_end(self, logs=None):
+        # Early stopping or the last epoch may fall between two periodic saves
+        if int(self._epoch.numpy()) % self.every:
+            self.save()
+
+    def load_best(self, model):
+        """Put the best weights seen so far (across resumes) into ``model``."""
+        if not os.path.exists(self.best_path):
+            return False
+        model.load_weights(self.best_path)
+        print(f"🏆 Best epoch {self.best_epoch}: {self.monitor} {self.best:.4f}")
+        return True
+
+
+def clear_checkpoints(directory):
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
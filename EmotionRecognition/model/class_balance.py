@@ -0,0 +1,54 @@
+"""
+Class balancing from a precomputed label index.
+
+The labels come from the packed store (labels.npy), a DatasetIndex or the
+generator's own ``classes`` array, so the class folders are never walked
+again just to count samples.
+
+    weights   per-class loss weights n / (k * count), for fit(class_weight=...)
+    sampling  stratified batches: every class is drawn with equal probability
+              from its own shuffled, repeating stream. An epoch keeps the
+              original number of batches; minority samples are revisited in
+              memory and nothing is copied on disk.
+"""
+import numpy as np
+
+BALANCE_MODES = ('none', 'weights', 'sampling')
+
+
+def class_counts(labels, num_classes):
+    return np.bincount(np.asarray(labels, dtype=np.int64), minlength=num_classes)
+
+
+def class_weights(labels, num_classes):
+    """{class_id: weight} so that every class contributes equally to the loss."""
+    counts = class_counts(labels, num_classes)
+    total = counts.sum()
+    return {c: float(total / (num_classes * n)) for c, n in enumerate(counts) if n}
+
+
+def split_by_class(labels, indices, num_classes):
+    """Per-class subsets of ``indices`` (positions into ``labels``)."""
+    indices = np.asarray(indices)
+    selected = np.asarray(labels)[indices]
+    return [indices[selected == c] for c in range(num_classes)]
+
+
+def balanced_dataset(class_datasets, sizes, seed=None):
+    """Interleave per-class datasets with equal probability, repeating each forever."""
+    import tensorflow as tf
+
+    streams = [
+        ds.shuffle(size, seed=seed, reshuffle_each_iteration=True).repeat()
+        for ds, size in zip(class_datasets, sizes) if size
+    ]
+    weights = [1.0 / len(streams)] * len(streams)
+    return tf.data.Dataset.sample_from_datasets(streams, weights=weights, seed=seed)
+
+
+def print_balance(class_names, labels, mode):
+    counts = class_counts(labels, len(class_names))
+    weights = class_weights(labels, len(class_names))
+    print(f"⚖️ Class balance ({mode}):")
+    for c, name in enumerate(class_names):
+        print(f"   {name:<10} {counts[c]:>6} images   weight {weights.get(c, 0.0):.2f}")
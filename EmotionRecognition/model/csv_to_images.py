@@ -1,7 +1,30 @@
-import csv
+"""
+Convert fer2013.csv into a training dataset.
+
+    python csv_to_images.py                      # packed arrays (default)
+    python csv_to_images.py --workers 4          # parse chunks in parallel
+    python csv_to_images.py --format jpg         # legacy: one JPEG per sample
+
+The packed format parses the pixel column in large vectorized chunks and
+writes one contiguous uint8 array instead of ~30k JPEG files:
+
+    <out>/images.npy   uint8 (N, 48, 48), memory-mappable with np.load(mmap_mode="r")
+    <out>/labels.npy   uint8 (N,), index into "classes"
+    <out>/index.json   classes, per-class counts, sample count
+
+Pixels are stored losslessly (no JPEG re-compression).
+"""
+import argparse
+import json
 import os
+from multiprocessing import Pool
+
 import numpy as np
-import cv2
+import pandas as pd
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+IMG_SIZE = 48
 
 # Emotion mapping from FER2013
 emotion_map = {
@@ -12,23 +35,109 @@ emotion_map = {
     5: 'surprise'
 }
 
-base_dir = "../dataset/train"
-os.makedirs(base_dir, exist_ok=True)
+# Class order used by training (alphabetical, like flow_from_directory)
+classes = sorted(emotion_map.values())
+fer_to_label = {fer_id: classes.index(name) for fer_id, name in emotion_map.items()}
+
+
+def read_chunks(csv_path, chunksize):
+    """Yield (fer_ids, pixel_strings) for rows whose emotion we keep."""
+    for chunk in pd.read_csv(csv_path, usecols=['emotion', 'pixels'], chunksize=chunksize):
+        chunk = chunk[chunk['emotion'].isin(list(emotion_map))]
+        if len(chunk):
+            yield chunk['emotion'].to_numpy(), chunk['pixels'].tolist()
+
+
+def parse_chunk(args):
+    """Parse a whole chunk of pixel strings with one vectorized call."""
+    fer_ids, pixel_strings = args
+    pixels = np.fromstring(' '.join(pixel_strings), dtype=np.uint8, sep=' ')
+    images = pixels.reshape(len(pixel_strings), IMG_SIZE, IMG_SIZE)
+    labels = np.array([fer_to_label[int(e)] for e in fer_ids], dtype=np.uint8)
+    return images, labels
+
+
+def parsed_chunks(csv_path, chunksize, workers):
+    chunks = read_chunks(csv_path, chunksize)
+    if workers > 1:
+        with Pool(workers) as pool:
+            # imap keeps the CSV order
+            yield from pool.imap(parse_chunk, chunks)
+    else:
+        yield from map(parse_chunk, chunks)
+
+
+def convert_packed(csv_path, out_dir, chunksize, workers):
+    os.makedirs(out_dir, exist_ok=True)
+    raw_path = os.path.join(out_dir, 'images.u8.tmp')
+    labels = []
+
+    # Stream raw pixels to disk first, since the sample count is unknown upfront
+    with open(raw_path, 'wb') as raw:
+        for images, chunk_labels in parsed_chunks(csv_path, chunksize, workers):
+            raw.write(images.tobytes())
+            labels.append(chunk_labels)
+
+    labels = np.concatenate(labels) if labels else np.empty(0, dtype=np.uint8)
+    n = len(labels)
+
+    source = np.memmap(raw_path, dtype=np.uint8, mode='r', shape=(n, IMG_SIZE, IMG_SIZE))
+    images = np.lib.format.open_memmap(
+        os.path.join(out_dir, 'images.npy'), mode='w+', dtype=np.uint8,
+        shape=(n, IMG_SIZE, IMG_SIZE)
+    )
+    images[:] = source
+    images.flush()
+    del images, source
+    os.remove(raw_path)
+
+    np.save(os.path.join(out_dir, 'labels.npy'), labels)
+    counts = np.bincount(labels, minlength=len(classes))
+    with open(os.path.join(out_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'classes': classes,
+            'counts': {name: int(c) for name, c in zip(classes, counts)},
+            'num_samples': int(n),
+            'source': os.path.abspath(csv_path),
+        }, f, indent=2)
+    return n
+
+
+def convert_jpg(csv_path, base_dir, chunksize):
+    """Legacy output: dataset/train/<emotion>/<row>.jpg"""
+    import cv2
 
-with open('../fer2013.csv') as file:
-    reader = csv.reader(file)
-    next(reader)  # skip header
+    row = 0
+    for chunk in pd.read_csv(csv_path, usecols=['emotion', 'pixels'], chunksize=chunksize):
+        for emotion, pixel_string in zip(chunk['emotion'], chunk['pixels']):
+            if emotion in emotion_map:
+                image = np.fromstring(pixel_string, dtype=np.uint8, sep=' ').reshape(IMG_SIZE, IMG_SIZE)
+                folder = os.path.join(base_dir, emotion_map[emotion])
+                os.makedirs(folder, exist_ok=True)
+                cv2.imwrite(f"{folder}/{row}.jpg", image)
+            row += 1
+    return row
 
-    for i, row in enumerate(reader):
-        emotion = int(row[0])
 
-        if emotion in emotion_map:
-            pixels = np.array(row[1].split(), dtype='uint8')
-            image = pixels.reshape(48, 48)
+def main():
+    parser = argparse.ArgumentParser(description="Convert fer2013.csv to a training dataset")
+    parser.add_argument('--csv', default=os.path.join(script_dir, '..', 'fer2013.csv'))
+    parser.add_argument('--format', choices=['packed', 'jpg'], default='packed')
+    parser.add_argument('--out', default=None,
+                        help="Output directory (default: ../dataset/packed, or ../dataset/train for jpg)")
+    parser.add_argument('--chunksize', type=int, default=4096, help="CSV rows parsed per chunk")
+    parser.add_argument('--workers', type=int, default=1, help="Parallel parser processes")
+    args = parser.parse_args()
 
-            folder = os.path.join(base_dir, emotion_map[emotion])
-            os.makedirs(folder, exist_ok=True)
+    if args.format == 'jpg':
+        out = args.out or os.path.join(script_dir, '..', 'dataset', 'train')
+        convert_jpg(args.csv, out, args.chunksize)
+        print("✅ CSV successfully converted to images!")
+    else:
+        out = args.out or os.path.join(script_dir, '..', 'dataset', 'packed')
+        n = convert_packed(args.csv, out, args.chunksize, args.workers)
+        print(f"✅ CSV successfully converted to packed arrays ({n} samples in {out})")
 
-            cv2.imwrite(f"{folder}/{i}.jpg", image)
 
-print("✅ CSV successfully converted to images!")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Index of an image dataset laid out as one folder per class.
+
+    dataset/train/angry/0.jpg
+    dataset/train/happy/1.jpg
+    ...
+
+Classes are the sorted folder names and files are sorted within each class,
+the same order Keras' flow_from_directory uses, so label indices and the
+validation split stay compatible with models trained by the generator.
+
+``load_index`` caches the scan next to the dataset folder
+(dataset/.train_index.json), keyed by the mtimes of the dataset and class
+folders, which change whenever a file is added, removed or renamed.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+DatasetIndex = namedtuple('DatasetIndex', ['class_names', 'paths', 'labels'])
+
+
+def scan_dataset(train_dir):
+    """Walk the class folders once and return a DatasetIndex."""
+    class_names = sorted(
+        d for d in os.listdir(train_dir) if os.path.isdir(os.path.join(train_dir, d))
+    )
+    paths, labels = [], []
+    for label, name in enumerate(class_names):
+        folder = os.path.join(train_dir, name)
+        files = sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+        paths += [os.path.join(folder, f) for f in files]
+        labels += [label] * len(files)
+    return DatasetIndex(class_names, paths, np.array(labels, dtype=np.int32))
+
+
+def source_mtime(train_dir):
+    """Latest mtime of the dataset folder and its class folders (changes on add/remove)."""
+    mtimes = [os.path.getmtime(train_dir)]
+    for entry in os.scandir(train_dir):
+        if entry.is_dir():
+            mtimes.append(entry.stat().st_mtime)
+    return max(mtimes)
+
+
+def index_cache_path(train_dir):
+    # Beside, not inside, the dataset folder so writing it does not bump its mtime
+    train_dir = os.path.abspath(train_dir)
+    return os.path.join(os.path.dirname(train_dir), f".{os.path.basename(train_dir)}_index.json")
+
+
+def load_index(train_dir, cache_path=None):
+    """scan_dataset, skipped when the cached index is still current."""
+    cache_path = cache_path or index_cache_path(train_dir)
+    root = os.path.abspath(train_dir)
+    mtime = source_mtime(train_dir)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['root'] == root and cached['source_mtime'] == mtime:
+            paths, labels = [], []
+            for label, name in enumerate(cached['classes']):
+                files = cached['files'][name]
+                paths += [os.path.join(train_dir, name, f) for f in files]
+                labels += [label] * len(files)
+            return DatasetIndex(cached['classes'], paths, np.array(labels, dtype=np.int32))
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = scan_dataset(train_dir)
+    files = {name: [] for name in index.class_names}
+    for path, label in zip(index.paths, index.labels):
+        files[index.class_names[label]].append(os.path.basename(path))
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'root': root, 'source_mtime': mtime,
+                       'classes': index.class_names, 'files': files}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # read-only dataset location; just skip the cache
+    return index
+
+
+def fingerprint(class_names, paths, labels):
+    """
+    Hash of the sorted sample list (class/file name). This is the dataset hash
+    of dataset/train for every loader: the directory and files sources hash
+    the folders, and a store packed from them records the same hash.
+    """
+    entries = sorted(f"{class_names[label]}/{os.path.basename(path)}" for path, label in zip(paths, labels))
+    return hashlib.sha1('\n'.join(entries).encode('utf-8')).hexdigest()
+
+
+def split_indices(labels, validation_split):
+    """
+    Split sample indices into (train, validation) like ImageDataGenerator does:
+    the first ``validation_split`` fraction of every class is validation.
+    """
+    train, val = [], []
+    for c in np.unique(labels):
+        members = np.flatnonzero(labels == c)
+        n_val = int(validation_split * len(members))
+        val.append(members[:n_val])
+        train.append(members[n_val:])
+    if not train:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(train), np.concatenate(val)
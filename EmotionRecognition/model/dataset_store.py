@@ -0,0 +1,167 @@
+"""
+Packed, memory-mapped dataset store.
+
+The class folders are decoded once into a single uint8 tensor on disk; after
+that, training reads batches straight from the memory map instead of
+opening and decoding ~30k JPEG files every epoch.
+
+Store layout (shared with csv_to_images.py):
+
+    <store>/images.npy   uint8 (N, 48, 48)
+    <store>/labels.npy   uint8 (N,)
+    <store>/index.json   classes, per-class counts, sample count, source
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from class_balance import balanced_dataset, split_by_class
+from dataset_index import fingerprint, load_index, source_mtime
+
+IMG_SIZE = 48
+
+
+def _decode(path):
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if img.shape != (IMG_SIZE, IMG_SIZE):
+        img = cv2.resize(img, (IMG_SIZE, IMG_SIZE))
+    return img
+
+
+def pack_directory(train_dir, store_dir, workers=None, index=None):
+    """Decode every image of ``train_dir`` once into ``store_dir``."""
+    index = index or load_index(train_dir)
+    os.makedirs(store_dir, exist_ok=True)
+    n = len(index.paths)
+
+    images = np.lib.format.open_memmap(
+        os.path.join(store_dir, 'images.npy'), mode='w+', dtype=np.uint8,
+        shape=(n, IMG_SIZE, IMG_SIZE)
+    )
+    # cv2 releases the GIL while decoding, so threads scale across cores
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        for i, img in enumerate(pool.map(_decode, index.paths, chunksize=256)):
+            images[i] = img
+    images.flush()
+    del images
+
+    labels = np.asarray(index.labels, dtype=np.uint8)
+    np.save(os.path.join(store_dir, 'labels.npy'), labels)
+    counts = np.bincount(labels, minlength=len(index.class_names))
+    with open(os.path.join(store_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'classes': list(index.class_names),
+            'counts': {name: int(c) for name, c in zip(index.class_names, counts)},
+            'num_samples': int(n),
+            'source': os.path.abspath(train_dir),
+            'source_mtime': source_mtime(train_dir),
+            # Same hash the directory/files sources compute for these folders
+            'hash': fingerprint(index.class_names, index.paths, index.labels),
+        }, f, indent=2)
+    return store_dir
+
+
+def open_store(store_dir):
+    """Return (images, labels, info); images is a read-only memory map."""
+    with open(os.path.join(store_dir, 'index.json'), 'r', encoding='utf-8') as f:
+        info = json.load(f)
+    images = np.load(os.path.join(store_dir, 'images.npy'), mmap_mode='r')
+    labels = np.load(os.path.join(store_dir, 'labels.npy'))
+    return images, labels, info
+
+
+def is_stale(store_dir, train_dir):
+    """True if the store is missing or older than the class folders it was packed from."""
+    index_path = os.path.join(store_dir, 'index.json')
+    if not os.path.exists(index_path):
+        return True
+    with open(index_path, 'r', encoding='utf-8') as f:
+        info = json.load(f)
+    if 'source_mtime' not in info:
+        # Packed from fer2013.csv by csv_to_images.py; nothing to compare against
+        return False
+    if not os.path.isdir(train_dir):
+        return False
+    return source_mtime(train_dir) > info['source_mtime']
+
+
+def store_fingerprint(images, labels, chunk=4096):
+    """Content hash of the packed pixels and labels (stores without class folders)."""
+    digest = hashlib.sha1(np.ascontiguousarray(labels).tobytes())
+    for start in range(0, len(images), chunk):
+        digest.update(np.ascontiguousarray(images[start:start + chunk]).tobytes())
+    return digest.hexdigest()
+
+
+def store_dataset_hash(images, labels, info):
+    """
+    The store's dataset hash: the class/file list hash of the folders it was
+    packed from (``dataset_index.fingerprint``, as for the other sources), or
+    a content hash for stores converted from fer2013.csv, which have no files.
+    """
+    if info.get('hash'):
+        return info['hash']
+    source = info.get('source')
+    if 'source_mtime' in info and source and os.path.isdir(source):
+        # Packed before the hash was recorded; is_stale keeps it in step with the folders
+        index = load_index(source)
+        return fingerprint(index.class_names, index.paths, index.labels)
+    return store_fingerprint(images, labels)
+
+
+def ensure_store(train_dir, store_dir, workers=None):
+    """Pack ``train_dir`` into ``store_dir`` unless an up-to-date store exists."""
+    if is_stale(store_dir, train_dir):
+        print(f"📦 Packing {train_dir} into {store_dir} (one-time)...")
+        pack_directory(train_dir, store_dir, workers=workers)
+    return open_store(store_dir)
+
+
+def make_dataset(images, labels, indices, num_classes, batch_size, shuffle=False, seed=None,
+                 parallel_calls=None, deterministic=True, prefetch=None, batch_transform=None,
+                 balanced=False):
+    """
+    tf.data pipeline over a memory-mapped store.
+
+    Only sample indices flow through shuffle/batch; each batch is gathered
+    from the memory map in one numpy call, then scaled to [0, 1] in-graph.
+    ``batch_transform`` (dataset -> dataset) runs on the scaled batches,
+    e.g. augmentation. ``balanced`` draws every class with equal probability
+    while keeping the number of batches per epoch.
+    """
+    import tensorflow as tf
+
+    def gather(batch_indices):
+        order = np.sort(batch_indices)  # sequential reads from the memory map
+        return images[order], labels[order].astype(np.int32)
+
+    def load(batch_indices):
+        x, y = tf.numpy_function(gather, [batch_indices], [tf.uint8, tf.int32])
+        x = tf.reshape(x, [-1, IMG_SIZE, IMG_SIZE, 1])
+        x = tf.cast(x, tf.float32) * (1.0 / 255.0)
+        y = tf.one_hot(tf.reshape(y, [-1]), num_classes)
+        return x, y
+
+    indices = np.asarray(indices, dtype=np.int64)
+    num_batches = -(-len(indices) // batch_size)
+    if balanced:
+        per_class = split_by_class(labels, indices, num_classes)
+        ds = balanced_dataset(
+            [tf.data.Dataset.from_tensor_slices(idx) for idx in per_class],
+            [len(idx) for idx in per_class], seed=seed,
+        )
+        ds = ds.batch(batch_size).take(num_batches)
+    else:
+        ds = tf.data.Dataset.from_tensor_slices(indices)
+        if shuffle:
+            ds = ds.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.batch(batch_size)
+    ds = ds.map(load, num_parallel_calls=parallel_calls or tf.data.AUTOTUNE,
+                deterministic=deterministic)
+    if batch_transform is not None:
+        ds = batch_transform(ds)
+    return ds.prefetch(prefetch or tf.data.AUTOTUNE)
@@ -0,0 +1,211 @@
+"""
+Accuracy and speed evaluation of model artifacts.
+
+    python model/evaluate_model.py                                   # emotion_model.h5
+    python model/evaluate_model.py model/emotion_model.h5 model/emotion_model_int8.tflite
+    python model/evaluate_model.py --output eval.json
+
+Every artifact (.h5/.keras, .tflite, .onnx) is run through the same
+inference backends the app uses, over the held-out validation split that
+train_model.py never trains on (first 20% of every class). Reported per
+artifact:
+
+    accuracy, per-class precision / recall / F1, confusion matrix
+    throughput      images/sec for batched inference (--batch-size)
+    latency         p50 / p95 / p99 milliseconds of single-image calls
+
+The JSON output makes it easy to check every speed optimization against
+its accuracy cost.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from dataset_index import fingerprint, load_index, split_indices
+from dataset_store import ensure_store, open_store, store_dataset_hash
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+
+# Allow importing inference.py from EmotionRecognition/
+sys.path.insert(0, project_root)
+from inference import IMG_SIZE, load_backend, warm_up
+from model_manifest import verify_model
+
+VALIDATION_SPLIT = 0.2
+
+
+def _subsample(indices, limit):
+    """Evenly spaced subset, so every class stays represented."""
+    if not limit or limit >= len(indices):
+        return indices
+    return indices[np.linspace(0, len(indices) - 1, limit).astype(np.int64)]
+
+
+def load_samples(data, train_dir, store_dir, pick, validation_split=VALIDATION_SPLIT):
+    """
+    Images chosen by ``pick(train_idx, val_idx, labels) -> indices`` from the
+    same train/validation split train_model.py uses for ``data``.
+
+    Returns (images float32 (N, 48, 48, 1), labels, class_names, dataset_hash);
+    dataset_hash is the one train_model.py records (the same for every
+    source), so it can be compared with a model manifest's ``dataset.hash``.
+    """
+    if data == 'store':
+        if os.path.isdir(train_dir):
+            images, labels, info = ensure_store(train_dir, store_dir)
+        else:
+            images, labels, info = open_store(store_dir)
+        class_names = info['classes']
+        dataset_hash = store_dataset_hash(images, labels, info)
+        idx = np.sort(pick(*split_indices(labels, validation_split), labels))
+        batch = images[idx]
+        labels = labels[idx]
+    else:
+        import cv2
+
+        index = load_index(train_dir)
+        class_names = index.class_names
+        dataset_hash = fingerprint(class_names, index.paths, index.labels)
+        idx = pick(*split_indices(index.labels, validation_split), index.labels)
+        batch = np.empty((len(idx), IMG_SIZE, IMG_SIZE), dtype=np.uint8)
+        for i, j in enumerate(idx):
+            img = cv2.imread(index.paths[j], cv2.IMREAD_GRAYSCALE)
+            batch[i] = cv2.resize(img, (IMG_SIZE, IMG_SIZE))
+        labels = index.labels[idx]
+    images = batch.astype(np.float32)[..., np.newaxis] * (1.0 / 255.0)
+    return images, labels.astype(np.int64), list(class_names), dataset_hash
+
+
+def load_holdout(data, train_dir, store_dir, validation_split=VALIDATION_SPLIT, limit=None):
+    """(images float32 (N, 48, 48, 1), labels, class_names) of the validation split."""
+    images, labels, class_names, _ = load_samples(
+        data, train_dir, store_dir, lambda train_idx, val_idx, labels: _subsample(val_idx, limit),
+        validation_split,
+    )
+    return images, labels, class_names
+
+
+def confusion_matrix(labels, preds, num_classes):
+    """Rows: true class, columns: predicted class."""
+    matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+    np.add.at(matrix, (labels, preds), 1)
+    return matrix
+
+
+def class_metrics(matrix, class_names):
+    metrics = {}
+    for c, name in enumerate(class_names):
+        tp = int(matrix[c, c])
+        predicted, actual = int(matrix[:, c].sum()), int(matrix[c].sum())
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / actual if actual else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        metrics[name] = {'precision': round(precision, 4), 'recall': round(recall, 4),
+                         'f1': round(f1, 4), 'support': actual}
+    return metrics
+
+
+def measure_throughput(backend, images, batch_size):
+    """Batched predictions and images/sec over the whole split."""
+    started = time.perf_counter()
+    probs = np.concatenate([backend(images[i:i + batch_size])
+                            for i in range(0, len(images), batch_size)])
+    elapsed = time.perf_counter() - started
+    return probs, len(images) / elapsed if elapsed > 0 else 0.0
+
+
+def measure_latency(backend, images, samples):
+    """Per-image latency percentiles (ms) of single-image calls."""
+    timings = []
+    for i in range(min(samples, len(images))):
+        one = images[i:i + 1]
+        started = time.perf_counter()
+        backend(one)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    if not timings:
+        return {}
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {'p50_ms': round(float(p50), 3), 'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3), 'samples': len(timings)}
+
+
+def evaluate(model_path, images, labels, class_names, batch_size, latency_samples, threads=None):
+    backend = load_backend(model_path, num_threads=threads)
+    manifest = verify_model(model_path, class_names, num_outputs=backend.num_classes)
+    warm_up(backend)
+
+    probs, images_per_sec = measure_throughput(backend, images, batch_size)
+    preds = np.argmax(probs, axis=1)
+    matrix = confusion_matrix(labels, preds, len(class_names))
+    return {
+        'model': model_path,
+        'size_kb': round(os.path.getsize(model_path) / 1024, 1),
+        'architecture': (manifest or {}).get('architecture'),
+        'trained_on': (manifest or {}).get('dataset', {}).get('hash'),
+        'accuracy': round(float(np.mean(preds == labels)), 4),
+        'per_class': class_metrics(matrix, class_names),
+        'confusion_matrix': matrix.tolist(),
+        'throughput_images_per_sec': round(images_per_sec, 1),
+        'batch_size': batch_size,
+        'latency': measure_latency(backend, images, latency_samples),
+    }
+
+
+def print_result(result, class_names):
+    print(f"\n📊 {os.path.basename(result['model'])} ({result['size_kb']:.0f} KB)")
+    print(f"   accuracy {result['accuracy']:.3f}, {result['throughput_images_per_sec']:.0f} images/sec "
+          f"(batch {result['batch_size']})")
+    latency = result['latency']
+    if latency:
+        print(f"   latency p50 {latency['p50_ms']:.2f} ms, p95 {latency['p95_ms']:.2f} ms, "
+              f"p99 {latency['p99_ms']:.2f} ms")
+    print(f"\n   {'class':<10} {'precision':>9} {'recall':>7} {'f1':>6} {'support':>8}")
+    for name in class_names:
+        m = result['per_class'][name]
+        print(f"   {name:<10} {m['precision']:>9.3f} {m['recall']:>7.3f} {m['f1']:>6.3f} {m['support']:>8}")
+
+    print(f"\n   confusion (rows: true, columns: predicted)")
+    print("   " + " " * 10 + "".join(f"{name[:7]:>8}" for name in class_names))
+    for name, row in zip(class_names, result['confusion_matrix']):
+        print(f"   {name:<10}" + "".join(f"{v:>8}" for v in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate model artifacts on the held-out split")
+    parser.add_argument('models', nargs='*', default=[os.path.join(script_dir, 'emotion_model.h5')],
+                        help="Model files (.h5, .keras, .tflite, .onnx)")
+    parser.add_argument('--data', choices=['store', 'files'], default='store')
+    parser.add_argument('--train-dir', default=os.path.join(project_root, 'dataset', 'train'))
+    parser.add_argument('--store-dir', default=os.path.join(project_root, 'dataset', 'packed'))
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--latency-samples', type=int, default=200,
+                        help="Single-image calls timed for the latency percentiles")
+    parser.add_argument('--limit', type=int, default=None, help="Evaluate at most this many images")
+    parser.add_argument('--threads', type=int, default=None, help="Inference threads (TFLite/ONNX)")
+    parser.add_argument('--output', default=None, help="Write all results to this JSON file")
+    args = parser.parse_args()
+
+    images, labels, class_names = load_holdout(args.data, args.train_dir, args.store_dir, limit=args.limit)
+    print(f"Evaluating on {len(images)} held-out images ({len(class_names)} classes)")
+
+    results = []
+    for model_path in args.models:
+        result = evaluate(model_path, images, labels, class_names,
+                          args.batch_size, args.latency_samples, args.threads)
+        print_result(result, class_names)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'num_images': int(len(images)), 'classes': class_names,
+                       'validation_split': VALIDATION_SPLIT, 'results': results}, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
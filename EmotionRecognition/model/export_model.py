@@ -0,0 +1,70 @@
+"""
+Export the trained emotion CNN to lightweight inference formats.
+
+    python model/export_model.py                     # emotion_model.tflite
+    python model/export_model.py --format tflite onnx
+
+The .tflite file is picked up automatically by the GUI and predict_webcam.py
+(see inference.default_model_path). ONNX export needs ``pip install tf2onnx``.
+"""
+import argparse
+import os
+import sys
+
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+IMG_SIZE = 48
+
+# Allow importing model_manifest.py from EmotionRecognition/
+sys.path.insert(0, os.path.dirname(script_dir))
+from model_manifest import derive_manifest
+
+
+def export_tflite(model, output_path):
+    """Float32 TFLite model with a dynamic batch dimension."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    tflite_model = converter.convert()
+    with open(output_path, "wb") as f:
+        f.write(tflite_model)
+    return output_path
+
+
+def export_onnx(model, output_path):
+    try:
+        import tf2onnx
+    except ImportError:
+        print("⚠️ tf2onnx not installed, skipping ONNX export (pip install tf2onnx)")
+        return None
+
+    spec = (tf.TensorSpec((None, IMG_SIZE, IMG_SIZE, 1), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, output_path=output_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export emotion_model.h5 for fast CPU inference")
+    parser.add_argument("--model", default=os.path.join(script_dir, "emotion_model.h5"),
+                        help="Keras model to export")
+    parser.add_argument("--format", nargs="+", choices=["tflite", "onnx"], default=["tflite"],
+                        help="Output formats")
+    parser.add_argument("--output-dir", default=script_dir,
+                        help="Directory for exported files")
+    args = parser.parse_args()
+
+    model = load_model(args.model, compile=False)
+    base = os.path.splitext(os.path.basename(args.model))[0]
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    exporters = {"tflite": export_tflite, "onnx": export_onnx}
+    for fmt in args.format:
+        output_path = os.path.join(args.output_dir, f"{base}.{fmt}")
+        if exporters[fmt](model, output_path):
+            derive_manifest(args.model, output_path)
+            size_kb = os.path.getsize(output_path) / 1024
+            print(f"✅ Exported {fmt.upper()} model to {output_path} ({size_kb:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+tf.data input pipelines for training.
+
+Two sources, both with the ImageDataGenerator 80/20 validation split (first
+20% of every sorted class is validation):
+
+    "files"  decode the JPEGs of dataset/train with parallel map calls
+    "store"  gather batches from the memory-mapped packed store
+
+Pipeline options:
+    parallel_calls  map parallelism (default tf.data.AUTOTUNE)
+    cache           None, "memory", or a file path prefix for an on-disk cache
+    deterministic   False lets parallel maps return elements out of order
+    prefetch        prefetch buffer in batches (default AUTOTUNE)
+    augment         batched in-graph augmentation of the training split
+    balanced        class-balanced sampling of the training split (class_balance.py)
+"""
+from collections import namedtuple
+
+import numpy as np
+import tensorflow as tf
+
+from augmentation import augment_dataset
+from class_balance import balanced_dataset, split_by_class
+from dataset_index import fingerprint, load_index, split_indices
+from dataset_store import ensure_store, make_dataset, store_dataset_hash
+
+IMG_SIZE = 48
+AUTOTUNE = tf.data.AUTOTUNE
+
+# dataset: {"source", "hash", "num_samples"}, recorded in the model manifest
+TrainingData = namedtuple('TrainingData', ['train', 'val', 'class_names', 'train_labels', 'dataset'])
+
+
+def _with_options(ds, deterministic):
+    options = tf.data.Options()
+    options.deterministic = deterministic
+    return ds.with_options(options)
+
+
+def _decode_file(path, label):
+    image = tf.io.decode_image(tf.io.read_file(path), channels=1, expand_animations=False)
+    image = tf.image.resize(image, [IMG_SIZE, IMG_SIZE], method='area')
+    return tf.cast(image, tf.uint8), label
+
+
+def _decoded(paths, labels, parallel_calls, cache, deterministic, cache_name):
+    ds = tf.data.Dataset.from_tensor_slices((list(paths), np.asarray(labels, dtype=np.int32)))
+    ds = ds.map(_decode_file, num_parallel_calls=parallel_calls, deterministic=deterministic)
+    if cache == 'memory':
+        ds = ds.cache()
+    elif cache:
+        ds = ds.cache(f"{cache}{cache_name}")
+    return ds
+
+
+def files_dataset(paths, labels, num_classes, batch_size, shuffle=False, seed=None,
+                  parallel_calls=AUTOTUNE, cache=None, deterministic=True, prefetch=AUTOTUNE,
+                  cache_name='', batch_transform=None, balanced=False):
+    """JPEG files -> parallel decode -> cache (uint8) -> shuffle -> batch -> scale."""
+    paths, labels = np.asarray(paths), np.asarray(labels)
+    if balanced:
+        # One decoded (and cached) stream per class, drawn with equal probability
+        per_class = split_by_class(labels, np.arange(len(labels)), num_classes)
+        ds = balanced_dataset(
+            [_decoded(paths[idx], labels[idx], parallel_calls, cache, deterministic,
+                      f"{cache_name}_{c}") for c, idx in enumerate(per_class)],
+            [len(idx) for idx in per_class], seed=seed,
+        )
+        ds = ds.batch(batch_size).take(-(-len(paths) // batch_size))
+    else:
+        ds = _decoded(paths, labels, parallel_calls, cache, deterministic, cache_name)
+        if shuffle:
+            ds = ds.shuffle(len(paths), seed=seed, reshuffle_each_iteration=True)
+        ds = ds.batch(batch_size)
+    # Scale and one-hot whole batches at once
+    ds = ds.map(
+        lambda x, y: (tf.cast(x, tf.float32) * (1.0 / 255.0), tf.one_hot(y, num_classes)),
+        num_parallel_calls=parallel_calls, deterministic=deterministic,
+    )
+    if batch_transform is not None:
+        ds = batch_transform(ds)
+    return _with_options(ds.prefetch(prefetch), deterministic)
+
+
+def build_datasets(source, train_dir, store_dir, batch_size, validation_split=0.2,
+                   parallel_calls=AUTOTUNE, cache=None, deterministic=True,
+                   prefetch=AUTOTUNE, seed=None, augment=False, balanced=False):
+    """Return the TrainingData for the chosen source."""
+    def transform_for(shuffle):
+        # Augment the training split only, after batching and scaling
+        if not (augment and shuffle):
+            return None
+        return lambda ds: augment_dataset(ds, seed, parallel_calls, deterministic)
+
+    if source == 'files':
+        index = load_index(train_dir)
+        class_names, labels = index.class_names, index.labels
+        dataset_hash = fingerprint(class_names, index.paths, labels)
+        train_idx, val_idx = split_indices(labels, validation_split)
+        paths = np.array(index.paths)
+
+        def make(idx, shuffle, name):
+            return files_dataset(
+                paths[idx], labels[idx], len(class_names), batch_size, shuffle=shuffle,
+                seed=seed, parallel_calls=parallel_calls, cache=cache,
+                deterministic=deterministic, prefetch=prefetch, cache_name=name,
+                batch_transform=transform_for(shuffle), balanced=balanced and shuffle,
+            )
+    elif source == 'store':
+        images, labels, info = ensure_store(train_dir, store_dir)
+        class_names = info['classes']
+        dataset_hash = store_dataset_hash(images, labels, info)
+        train_idx, val_idx = split_indices(labels, validation_split)
+        if cache == 'memory':
+            images = np.array(images)  # load the memory map into RAM once
+        elif cache:
+            print("ℹ️ The packed store is already on disk; ignoring on-disk cache")
+
+        def make(idx, shuffle, name):
+            return _with_options(make_dataset(
+                images, labels, idx, len(class_names), batch_size, shuffle=shuffle,
+                seed=seed, parallel_calls=parallel_calls, deterministic=deterministic,
+                prefetch=prefetch, batch_transform=transform_for(shuffle),
+                balanced=balanced and shuffle,
+            ), deterministic)
+    else:
+        raise ValueError(f"Unknown data source: {source}")
+
+    print(f"Found {len(train_idx)} training and {len(val_idx)} validation images "
+          f"({len(class_names)} classes, source={source})")
+    train_ds = make(train_idx, True, '_train')
+    val_ds = make(val_idx, False, '_val')
+    dataset = {'source': source, 'hash': dataset_hash, 'num_samples': int(len(labels))}
+    return TrainingData(train_ds, val_ds, list(class_names), np.asarray(labels)[train_idx], dataset)
@@ -0,0 +1,157 @@
+"""
+Post-training full-integer (int8) quantization of the emotion CNN.
+
+    python model/quantize_model.py
+    python model/quantize_model.py --calibration-per-class 200 --eval-per-class 400
+    python model/quantize_model.py --data files     # model trained with --data files/directory
+
+Calibrates activation ranges on a sample of the training split, writes
+emotion_model_int8.tflite (int8 weights, activations, input and output) and
+prints per-class accuracy of the float and int8 models on a sample of the
+held-out validation split (the images train_model.py never trains on, as in
+evaluate_model.py), so the accuracy cost is visible before deploying. Pass
+the same ``--data`` source (packed store by default, or ``files``) the
+model was trained with.
+
+The accuracy change is recorded in the manifest. It only counts as held out
+when the dataset hash matches the one in the model's manifest, and the app
+only picks the int8 model by itself when that holds and it costs at most
+``inference.MAX_INT8_ACCURACY_DROP`` (see ``inference.default_model_path``).
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+
+# Allow importing inference.py from EmotionRecognition/
+sys.path.insert(0, project_root)
+from evaluate_model import load_samples
+from inference import MAX_INT8_ACCURACY_DROP, KerasBackend, TFLiteBackend
+from model_manifest import derive_manifest, read_manifest, write_manifest
+
+
+def sample_dataset(data, train_dir, store_dir, calibration_per_class, eval_per_class, seed=42):
+    """
+    Sample calibration images from the training split and evaluation images
+    from the held-out split of every class, with the same source and split
+    as train_model.py (see evaluate_model.load_samples), so the two never
+    overlap and the evaluation images are ones training held out.
+
+    Returns (class_names, calibration_images, eval_images, eval_labels,
+    dataset_hash); images are float32 (N, 48, 48, 1) in [0, 1].
+    """
+    rng = np.random.default_rng(seed)
+
+    def per_class(split, count):
+        def pick(train_idx, val_idx, labels):
+            idx = train_idx if split == 'train' else val_idx
+            return np.concatenate([rng.permutation(idx[labels[idx] == c])[:count]
+                                   for c in np.unique(labels)])
+        return pick
+
+    calibration, _, class_names, dataset_hash = load_samples(
+        data, train_dir, store_dir, per_class('train', calibration_per_class))
+    eval_images, eval_labels, _, _ = load_samples(
+        data, train_dir, store_dir, per_class('val', eval_per_class))
+    return class_names, calibration, eval_images, eval_labels, dataset_hash
+
+
+def quantize(model, calibration_images):
+    """Convert a Keras model to a full-integer TFLite flatbuffer."""
+    def representative_dataset():
+        for image in calibration_images:
+            yield [image[np.newaxis]]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def per_class_accuracy(predict, images, labels, num_classes, batch_size=256):
+    preds = np.concatenate([
+        np.argmax(predict(images[i:i + batch_size]), axis=1)
+        for i in range(0, len(images), batch_size)
+    ])
+    accuracy = {}
+    for c in range(num_classes):
+        mask = labels == c
+        accuracy[c] = float(np.mean(preds[mask] == c)) if mask.any() else float("nan")
+    return accuracy, float(np.mean(preds == labels))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-integer quantization of emotion_model.h5")
+    parser.add_argument("--model", default=os.path.join(script_dir, "emotion_model.h5"))
+    parser.add_argument("--data", choices=["store", "files"], default="store",
+                        help="Dataset source the model was trained on (as in train_model.py)")
+    parser.add_argument("--train-dir", default=os.path.join(project_root, "dataset", "train"))
+    parser.add_argument("--store-dir", default=os.path.join(project_root, "dataset", "packed"))
+    parser.add_argument("--output", default=os.path.join(script_dir, "emotion_model_int8.tflite"))
+    parser.add_argument("--calibration-per-class", type=int, default=100,
+                        help="Representative images per class used for calibration")
+    parser.add_argument("--eval-per-class", type=int, default=300,
+                        help="Held-out images per class for the accuracy report")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    model = load_model(args.model, compile=False)
+    class_names, calibration, eval_images, eval_labels, dataset_hash = sample_dataset(
+        args.data, args.train_dir, args.store_dir, args.calibration_per_class, args.eval_per_class, args.seed
+    )
+    # The split is only the model's held-out data if it was trained on this very dataset
+    trained_on = ((read_manifest(args.model) or {}).get("dataset") or {}).get("hash")
+    on_holdout = trained_on is not None and trained_on == dataset_hash
+    print(f"Calibrating on {len(calibration)} training images, "
+          f"evaluating on {len(eval_images)} held-out images")
+    if not on_holdout:
+        print(f"⚠️ {os.path.basename(args.model)} was not trained on this dataset (--data {args.data}); "
+              f"the evaluation images may have been trained on")
+
+    with open(args.output, "wb") as f:
+        f.write(quantize(model, calibration))
+
+    float_acc, float_total = per_class_accuracy(
+        KerasBackend(model), eval_images, eval_labels, len(class_names)
+    )
+    int8_acc, int8_total = per_class_accuracy(
+        TFLiteBackend(args.output), eval_images, eval_labels, len(class_names)
+    )
+
+    print(f"\n{'class':<10} {'float32':>8} {'int8':>8} {'delta':>8}")
+    for c, name in enumerate(class_names):
+        print(f"{name:<10} {float_acc[c]:>8.3f} {int8_acc[c]:>8.3f} {int8_acc[c] - float_acc[c]:>+8.3f}")
+    print(f"{'overall':<10} {float_total:>8.3f} {int8_total:>8.3f} {int8_total - float_total:>+8.3f}")
+    quantization = {
+        "float32_accuracy": round(float_total, 4), "int8_accuracy": round(int8_total, 4),
+        "accuracy_drop": round(float_total - int8_total, 4),
+        "calibration_images": len(calibration), "eval_images": len(eval_images),
+        "data": args.data, "evaluated_on": "holdout" if on_holdout else "unverified",
+    }
+    if derive_manifest(args.model, args.output, quantization=quantization) is None:
+        # Source model predates manifests; still record the classes and the measured cost
+        write_manifest(args.output, None, class_names, quantization=quantization)
+    if not on_holdout:
+        print("\n⚠️ The accuracy change was not measured on the model's held-out split; the app will "
+              "not pick the int8 model by itself (set EMOTION_MODEL to use it anyway)")
+    elif float_total - int8_total > MAX_INT8_ACCURACY_DROP:
+        print(f"\n⚠️ int8 costs more than {MAX_INT8_ACCURACY_DROP:.0%} accuracy; the app will not "
+              f"pick it by itself (set EMOTION_MODEL to use it anyway)")
+
+    float_kb = os.path.getsize(args.model) / 1024
+    int8_kb = os.path.getsize(args.output) / 1024
+    print(f"\n✅ Saved int8 model to {args.output} "
+          f"({int8_kb:.0f} KB vs {float_kb:.0f} KB .h5, {float_kb / int8_kb:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
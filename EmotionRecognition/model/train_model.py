@@ -1,72 +1,255 @@
+"""
+Train the emotion recognition CNN.
+
+    python model/train_model.py                          # standard preset, packed store
+    python model/train_model.py --architecture compact   # smaller 2-block network
+
+Paths default to EmotionRecognition/dataset and EmotionRecognition/model, so
+the script works from any directory. The model is written with a manifest
+(emotion_model.h5.json) recording the architecture, classes, dataset hash
+and best metrics.
+"""
+import argparse
+import os
+import sys
+
 import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Dense, Flatten, Dropout
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
-import os
 
-# Parameters
+from architectures import ARCHITECTURES, DEFAULT_ARCHITECTURE, build_model
+from checkpointing import TrainingCheckpoint, clear_checkpoints
+from class_balance import BALANCE_MODES, class_weights, print_balance
+from dataset_index import fingerprint
+from input_pipeline import AUTOTUNE, TrainingData, build_datasets
+from training_callbacks import ThroughputCallback
+from training_setup import (
+    configure_threads, enable_mixed_precision, scaled_learning_rate, write_report,
+)
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+
+# Allow importing model_manifest.py from EmotionRecognition/
+sys.path.insert(0, project_root)
+from model_manifest import write_manifest
+
+# Parameters (defaults; see --batch-size / --epochs)
 IMG_SIZE = 48
 BATCH_SIZE = 32
-EPOCHS = 12   # keep low for faster training
+EPOCHS = 12   # upper bound; early stopping usually ends training sooner
+PATIENCE = 3
+VALIDATION_SPLIT = 0.2
 
-# Data generator
-datagen = ImageDataGenerator(
-    rescale=1./255,
-    validation_split=0.2
-)
 
-train_data = datagen.flow_from_directory(
-    'dataset/train',
-    target_size=(IMG_SIZE, IMG_SIZE),
-    color_mode='grayscale',
-    class_mode='categorical',
-    batch_size=BATCH_SIZE,
-    subset='training'
-)
+def generator_data(train_dir, batch_size=BATCH_SIZE):
+    """Original pipeline: decode JPEGs from the class folders every epoch."""
+    datagen = ImageDataGenerator(
+        rescale=1./255,
+        validation_split=VALIDATION_SPLIT
+    )
 
-val_data = datagen.flow_from_directory(
-    'dataset/train',
-    target_size=(IMG_SIZE, IMG_SIZE),
-    color_mode='grayscale',
-    class_mode='categorical',
-    batch_size=BATCH_SIZE,
-    subset='validation'
-)
+    train_data = datagen.flow_from_directory(
+        train_dir,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        color_mode='grayscale',
+        class_mode='categorical',
+        batch_size=batch_size,
+        subset='training'
+    )
 
-# CNN model
-model = Sequential([
-    Conv2D(32, (3,3), activation='relu', input_shape=(48,48,1)),
-    MaxPooling2D(2,2),
+    val_data = datagen.flow_from_directory(
+        train_dir,
+        target_size=(IMG_SIZE, IMG_SIZE),
+        color_mode='grayscale',
+        class_mode='categorical',
+        batch_size=batch_size,
+        subset='validation'
+    )
+    class_names = sorted(train_data.class_indices, key=train_data.class_indices.get)
+    names = list(train_data.filenames) + list(val_data.filenames)
+    labels = list(train_data.classes) + list(val_data.classes)
+    dataset = {'source': 'directory', 'hash': fingerprint(class_names, names, labels),
+               'num_samples': len(names)}
+    return TrainingData(train_data, val_data, class_names, train_data.classes, dataset)
 
-    Conv2D(64, (3,3), activation='relu'),
-    MaxPooling2D(2,2),
 
-    Conv2D(128, (3,3), activation='relu'),
-    MaxPooling2D(2,2),
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the emotion recognition CNN")
+    parser.add_argument('--architecture', choices=list(ARCHITECTURES), default=DEFAULT_ARCHITECTURE,
+                        help="Network preset (see model/architectures.py)")
+    parser.add_argument('--train-dir', default=os.path.join(project_root, 'dataset', 'train'))
+    parser.add_argument('--data', choices=['store', 'files', 'directory'], default='store',
+                        help="'store': memory-mapped packed arrays (default); "
+                             "'files': tf.data with parallel JPEG decoding; "
+                             "'directory': ImageDataGenerator over the JPEG folders")
+    parser.add_argument('--store-dir', default=os.path.join(project_root, 'dataset', 'packed'),
+                        help="Packed store (created from --train-dir if missing or stale)")
+    parser.add_argument('--output', default=os.path.join(script_dir, 'emotion_model.h5'))
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--epochs', type=int, default=EPOCHS,
+                        help="Total epochs, including those of a resumed run")
+    parser.add_argument('--balance', choices=BALANCE_MODES, default='none',
+                        help="'weights': per-class loss weights; "
+                             "'sampling': class-balanced batches (store/files only)")
 
-    Flatten(),
-    Dense(128, activation='relu'),
-    Dropout(0.5),
-    Dense(5, activation='softmax')
-])
+    pipeline = parser.add_argument_group('tf.data pipeline (store/files)')
+    pipeline.add_argument('--parallel-calls', type=int, default=AUTOTUNE,
+                          help="Parallel map calls (default: AUTOTUNE)")
+    pipeline.add_argument('--cache', default=None,
+                          help="'memory' or an on-disk cache path prefix (default: no cache)")
+    pipeline.add_argument('--non-deterministic', action='store_true',
+                          help="Allow out-of-order elements for higher throughput")
+    pipeline.add_argument('--prefetch', type=int, default=AUTOTUNE,
+                          help="Prefetch buffer in batches (default: AUTOTUNE)")
+    pipeline.add_argument('--augment', action='store_true',
+                          help="Batched in-graph flip/rotation/shift/brightness/contrast "
+                               "augmentation of the training split")
 
-model.compile(
-    optimizer='adam',
-    loss='categorical_crossentropy',
-    metrics=['accuracy']
-)
+    checkpoints = parser.add_argument_group('checkpoints')
+    checkpoints.add_argument('--checkpoint-dir', default=None,
+                             help="Weights + optimizer state, resumed automatically "
+                                  "(default: model/checkpoints/<architecture>)")
+    checkpoints.add_argument('--checkpoint-every', type=int, default=1, help="Epochs between checkpoints")
+    checkpoints.add_argument('--fresh', action='store_true',
+                             help="Delete existing checkpoints instead of resuming")
+    checkpoints.add_argument('--patience', type=int, default=PATIENCE,
+                             help="Stop after this many epochs without val_loss improvement (0: off)")
 
-model.summary()
+    runtime = parser.add_argument_group('runtime')
+    runtime.add_argument('--intra-op-threads', type=int, default=0,
+                         help="Threads used inside one op (default 0: all cores)")
+    runtime.add_argument('--inter-op-threads', type=int, default=0,
+                         help="Ops run in parallel (default 0: TensorFlow decides)")
+    runtime.add_argument('--mixed-precision', action='store_true',
+                         help="bfloat16 compute with float32 weights (CPUs with AVX512-BF16/AMX)")
+    runtime.add_argument('--force-mixed-precision', action='store_true',
+                         help="Use bfloat16 even if the CPU has no native support")
+    runtime.add_argument('--xla', action='store_true', help="Compile the train step with XLA")
+    runtime.add_argument('--learning-rate', type=float, default=None,
+                         help="Default: 1e-3 scaled linearly by batch size / 32")
+    runtime.add_argument('--report', default=None,
+                         help="Write the configuration and per-epoch images/sec to this JSON file")
+    args = parser.parse_args(argv)
+    checkpoint_dir = args.checkpoint_dir or os.path.join(script_dir, 'checkpoints', args.architecture)
 
-# Train
-model.fit(
-    train_data,
-    validation_data=val_data,
-    epochs=EPOCHS
-)
+    # Must run before TensorFlow executes any op
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+    mixed = False
+    if args.mixed_precision or args.force_mixed_precision:
+        mixed = enable_mixed_precision(force=args.force_mixed_precision)
+
+    if args.augment and args.data == 'directory':
+        parser.error("--augment needs a tf.data source (--data store or --data files)")
+    if args.balance == 'sampling' and args.data == 'directory':
+        parser.error("--balance sampling needs a tf.data source; use --balance weights")
+    has_store = args.data == 'store' and os.path.exists(os.path.join(args.store_dir, 'index.json'))
+    if not (os.path.isdir(args.train_dir) or has_store):
+        parser.error(f"Training dataset not found: {args.train_dir} "
+                     f"(create it with model/csv_to_images.py)")
+
+    if args.data == 'directory':
+        data = generator_data(args.train_dir, args.batch_size)
+    else:
+        data = build_datasets(
+            args.data, args.train_dir, args.store_dir, args.batch_size,
+            validation_split=VALIDATION_SPLIT,
+            parallel_calls=args.parallel_calls,
+            cache=args.cache,
+            deterministic=not args.non_deterministic,
+            prefetch=args.prefetch,
+            augment=args.augment,
+            balanced=args.balance == 'sampling',
+        )
+    train_data, val_data, class_names = data.train, data.val, data.class_names
+    train_labels, num_classes = data.train_labels, len(data.class_names)
+
+    weights = None
+    if args.balance != 'none':
+        print_balance(class_names, train_labels, args.balance)
+        if args.balance == 'weights':
+            weights = class_weights(train_labels, num_classes)
+
+    model = build_model(args.architecture, num_classes)
+
+    learning_rate = args.learning_rate or scaled_learning_rate(args.batch_size)
+    print(f"⚙️ batch {args.batch_size}, lr {learning_rate:g}, "
+          f"{'mixed_bfloat16' if mixed else 'float32'}, XLA {'on' if args.xla else 'off'}")
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate),
+        loss='categorical_crossentropy',
+        metrics=['accuracy'],
+        jit_compile=args.xla
+    )
+
+    model.summary()
+
+    # Resume from the latest checkpoint, if any (only one written by the same run)
+    if args.fresh:
+        clear_checkpoints(checkpoint_dir)
+    run_info = {
+        # The dataset hash is the same for every --data source of the same folders
+        'architecture': args.architecture,
+        'dataset_hash': data.dataset.get('hash'), 'batch_size': args.batch_size,
+    }
+    checkpoint = TrainingCheckpoint(checkpoint_dir, every=args.checkpoint_every, run_info=run_info)
+    initial_epoch = checkpoint.restore(model)
+
+    # Train
+    # Class-balanced sampling only draws full batches
+    samples_per_epoch = None if args.balance == 'sampling' else len(train_labels)
+    throughput = ThroughputCallback(args.batch_size, samples_per_epoch)
+    callbacks = [throughput, checkpoint]
+    if args.patience > 0:
+        callbacks.append(tf.keras.callbacks.EarlyStopping(
+            monitor='val_loss', patience=args.patience, restore_best_weights=True, verbose=1
+        ))
+    try:
+        model.fit(
+            train_data,
+            validation_data=val_data,
+            epochs=args.epochs,
+            initial_epoch=initial_epoch,
+            class_weight=weights,
+            callbacks=callbacks
+        )
+    except KeyboardInterrupt:
+        checkpoint.save()
+        print("⏸ Training interrupted; run again to resume from the checkpoint")
+        return
+
+    config = {
+        'architecture': args.architecture, 'data': args.data, 'batch_size': args.batch_size, 'epochs': args.epochs,
+        'learning_rate': learning_rate, 'mixed_precision': mixed, 'xla': args.xla,
+        'intra_op_threads': args.intra_op_threads, 'inter_op_threads': args.inter_op_threads,
+    }
+    report = write_report(args.report, config, throughput.epochs) if args.report else None
+    rates = [e['images_per_sec'] for e in throughput.epochs[1:]] or \
+        [e['images_per_sec'] for e in throughput.epochs]
+    if rates:
+        print(f"⏱ Mean {sum(rates) / len(rates):.1f} images/sec "
+              f"(first epoch excluded when possible, {os.cpu_count()} CPU cores)")
+    if report:
+        print(f"📄 Throughput report written to {args.report}")
+
+    # Export only the best epoch (lowest val_loss across resumes)
+    checkpoint.load_best(model)
+    if mixed:
+        # Save a float32 copy so inference/export never depend on the bf16 policy
+        tf.keras.mixed_precision.set_global_policy('float32')
+        trained, model = model, build_model(args.architecture, num_classes)
+        model.set_weights(trained.get_weights())
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    model.save(args.output)
+    write_manifest(
+        args.output, args.architecture, class_names, dataset=data.dataset,
+        metrics=dict(checkpoint.best_metrics, best_epoch=checkpoint.best_epoch),
+        config=config,
+    )
+    # The run is complete; a later run must not resume from (and re-export) it
+    clear_checkpoints(checkpoint_dir)
+
+    print("✅ Emotion model trained and saved successfully!")
 
-# Save model
-os.makedirs('model', exist_ok=True)
-model.save('model/emotion_model.h5')
 
-print("✅ Emotion model trained and saved successfully!")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Train the text emotion model (text_model.py) on labelled text.
+
+    python model/train_text_model.py                           # bundled seed set
+    python model/train_text_model.py journal_labels.csv more.csv --epochs 30
+
+Input files are CSV with ``text`` and ``emotion`` columns. Labels from
+common emotion datasets are mapped onto the app's classes (joy -> happy,
+sadness/fear -> sad, anger -> angry, ...); rows with other labels are
+skipped. The bundled text_seed.csv is only a starting point: a model
+trained on real entries does much better.
+
+Training is mini-batch softmax regression with AdaGrad on the hashed
+features, CPU only, and takes seconds for tens of thousands of rows. The
+model is written with a manifest (text_emotion_model.npz.json).
+"""
+import argparse
+import csv
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(script_dir)
+
+# Allow importing inference.py / text_model.py / model_manifest.py from EmotionRecognition/
+sys.path.insert(0, project_root)
+from inference import CLASSES
+from model_manifest import write_manifest
+from text_model import (
+    DEFAULT_N_FEATURES, DEFAULT_TEXT_MODEL, TextEmotionModel, TextFeaturizer, softmax, sparse_logits,
+    to_sparse,
+)
+
+LABEL_ALIASES = {
+    'anger': 'angry', 'annoyance': 'angry', 'disgust': 'angry',
+    'joy': 'happy', 'love': 'happy', 'gratitude': 'happy', 'happiness': 'happy',
+    'sadness': 'sad', 'fear': 'sad', 'grief': 'sad', 'worry': 'sad',
+    'surprised': 'surprise', 'amazement': 'surprise',
+    'none': 'neutral', 'calm': 'neutral',
+}
+VALIDATION_SPLIT = 0.2
+
+
+def load_labelled(paths):
+    """(texts, labels as class indices) from CSV files."""
+    texts, labels, skipped = [], [], 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                label = (row.get('emotion') or row.get('label') or '').strip().lower()
+                label = LABEL_ALIASES.get(label, label)
+                text = (row.get('text') or '').strip()
+                if label in CLASSES and text:
+                    texts.append(text)
+                    labels.append(CLASSES.index(label))
+                else:
+                    skipped += 1
+    if skipped:
+        print(f"⚠️ Skipped {skipped} rows without text or with an unknown label")
+    return texts, np.asarray(labels, dtype=np.int64)
+
+
+def split(num_samples, validation_split, seed=0):
+    """Shuffled (train, validation) indices; no validation set for tiny inputs."""
+    order = np.random.default_rng(seed).permutation(num_samples)
+    num_val = int(num_samples * validation_split) if num_samples >= 50 else 0
+    return order[num_val:], order[:num_val]
+
+
+def train(featurizer, texts, labels, epochs, batch_size, learning_rate, l2, seed=0):
+    num_classes = len(CLASSES)
+    weights = np.zeros((featurizer.n_features, num_classes), dtype=np.float32)
+    bias = np.zeros(num_classes, dtype=np.float32)
+    grad_sq = np.full_like(weights, 1e-8)  # AdaGrad accumulators
+    bias_sq = np.full_like(bias, 1e-8)
+    targets = np.eye(num_classes, dtype=np.float32)[labels]
+
+    # Featurize once; every epoch reuses the same sparse rows
+    features = [featurizer.features(t) for t in texts]
+    rng = np.random.default_rng(seed)
+    for epoch in range(1, epochs + 1):
+        loss = 0.0
+        order = rng.permutation(len(texts))
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            rows, cols, values = to_sparse([features[j] for j in idx])
+            probs = softmax(sparse_logits(rows, cols, values, weights, bias, len(idx)))
+            loss -= float(np.sum(np.log(probs[np.arange(len(idx)), labels[idx]] + 1e-12)))
+
+            error = probs - targets[idx]
+            # Gradient only for the buckets this batch touched
+            touched, inverse = np.unique(cols, return_inverse=True)
+            grad = np.zeros((len(touched), num_classes), dtype=np.float32)
+            np.add.at(grad, inverse, error[rows] * values[:, np.newaxis])
+            grad += l2 * weights[touched]
+            grad_sq[touched] += grad ** 2
+            weights[touched] -= learning_rate * grad / np.sqrt(grad_sq[touched])
+
+            bias_grad = error.sum(axis=0)
+            bias_sq += bias_grad ** 2
+            bias -= learning_rate * bias_grad / np.sqrt(bias_sq)
+        if epoch == 1 or epoch % 5 == 0 or epoch == epochs:
+            print(f"   epoch {epoch}/{epochs}: loss {loss / len(texts):.4f}")
+    return TextEmotionModel(CLASSES, weights, bias, featurizer.n_features)
+
+
+def dataset_info(paths, num_samples):
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return {'source': [os.path.basename(p) for p in paths], 'hash': digest.hexdigest(),
+            'num_samples': num_samples}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram text emotion model")
+    parser.add_argument('inputs', nargs='*', default=[os.path.join(script_dir, 'text_seed.csv')],
+                        help="CSV files with text and emotion columns")
+    parser.add_argument('--output', default=DEFAULT_TEXT_MODEL)
+    parser.add_argument('--n-features', type=int, default=DEFAULT_N_FEATURES,
+                        help="Hash buckets (default 2^18)")
+    parser.add_argument('--epochs', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--learning-rate', type=float, default=0.5)
+    parser.add_argument('--l2', type=float, default=1e-4)
+    args = parser.parse_args()
+
+    texts, labels = load_labelled(args.inputs)
+    if not texts:
+        raise SystemExit("❌ No labelled rows found")
+    counts = np.bincount(labels, minlength=len(CLASSES))
+    print(f"Training on {len(texts)} texts: "
+          + ", ".join(f"{name} {n}" for name, n in zip(CLASSES, counts)))
+
+    train_idx, val_idx = split(len(texts), VALIDATION_SPLIT)
+    featurizer = TextFeaturizer(args.n_features)
+    started = time.perf_counter()
+    model = train(featurizer, [texts[i] for i in train_idx], labels[train_idx],
+                  args.epochs, args.batch_size, args.learning_rate, args.l2)
+    print(f"   trained in {time.perf_counter() - started:.1f}s")
+
+    metrics = {}
+    if len(val_idx):
+        preds = model.predict_proba([texts[i] for i in val_idx]).argmax(axis=1)
+        metrics['val_accuracy'] = round(float(np.mean(preds == labels[val_idx])), 4)
+        print(f"   validation accuracy {metrics['val_accuracy']:.3f} ({len(val_idx)} texts)")
+        # Final model uses every row
+        model = train(featurizer, texts, labels, args.epochs, args.batch_size,
+                      args.learning_rate, args.l2)
+
+    model.save(args.output)
+    write_manifest(
+        args.output, 'hashed-ngram-linear', CLASSES, dataset=dataset_info(args.inputs, len(texts)),
+        metrics=metrics, format='text-linear',
+        config={'n_features': args.n_features, 'epochs': args.epochs,
+                'batch_size': args.batch_size, 'learning_rate': args.learning_rate, 'l2': args.l2},
+    )
+    print(f"✅ Text model saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
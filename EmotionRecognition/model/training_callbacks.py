@@ -0,0 +1,45 @@
+"""
+Keras callbacks used by train_model.py.
+"""
+import time
+
+import tensorflow as tf
+
+
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """Prints training steps/sec and images/sec for every epoch."""
+
+    def __init__(self, batch_size, samples_per_epoch=None):
+        super().__init__()
+        self.batch_size = batch_size
+        # Training samples in one full epoch; the last step usually holds a partial
+        # batch. None when every step is a full batch (class-balanced sampling).
+        self.samples_per_epoch = samples_per_epoch
+        self.epochs = []  # per-epoch {"epoch", "steps", "images", "seconds", "steps_per_sec", "images_per_sec"}
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._steps = 0
+        self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._steps += 1
+        self._last_step_time = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        # Measured up to the last training step, so validation time is excluded
+        seconds = self._last_step_time - self._start if self._steps else 0.0
+        steps_per_sec = self._steps / seconds if seconds > 0 else 0.0
+        images = self._steps * self.batch_size
+        if self.samples_per_epoch is not None:
+            images = min(images, self.samples_per_epoch)
+        record = {
+            "epoch": epoch + 1,
+            "steps": self._steps,
+            "images": images,
+            "seconds": round(seconds, 3),
+            "steps_per_sec": round(steps_per_sec, 2),
+            "images_per_sec": round(images / seconds, 1) if seconds > 0 else 0.0,
+        }
+        self.epochs.append(record)
+        print(f"⏱ Epoch {record['epoch']}: {record['steps_per_sec']} steps/sec, "
+              f"{record['images_per_sec']} images/sec")
@@ -0,0 +1,108 @@
+"""
+Manifests describing trained model artifacts.
+
+Every artifact gets a JSON file next to it (``emotion_model.h5`` ->
+``emotion_model.h5.json``) recording what it is and how it was made:
+
+    architecture   preset name (model/architectures.py)
+    classes        output order, e.g. ["angry", "happy", "neutral", "sad", "surprise"]
+    dataset        {"source", "hash", "num_samples"}
+    metrics        e.g. best val_loss / val_accuracy
+    format         "keras", "tflite", "tflite-int8", "onnx"
+    sha256         hash of the artifact file, to detect a stale manifest
+
+Consumers call ``verify_model`` before serving a model.
+"""
+import hashlib
+import json
+import os
+import time
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def manifest_path(model_path):
+    return f"{model_path}.json"
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(model_path, architecture, classes, dataset=None, metrics=None, **extra):
+    manifest = {
+        "model": os.path.basename(model_path),
+        "format": extra.pop("format", _format_of(model_path)),
+        "architecture": architecture,
+        "classes": list(classes),
+        "dataset": dataset or {},
+        "metrics": metrics or {},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sha256": file_sha256(model_path),
+        **extra,
+    }
+    with open(manifest_path(model_path), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def derive_manifest(source_model_path, model_path, **updates):
+    """Manifest for an artifact exported from another one (same classes and dataset)."""
+    source = read_manifest(source_model_path)
+    if source is None:
+        return None
+    fields = {k: v for k, v in source.items()
+              if k not in ("model", "format", "created", "sha256")}
+    fields.update(updates)
+    fields["exported_from"] = os.path.basename(source_model_path)
+    return write_manifest(model_path, **fields)
+
+
+def read_manifest(model_path):
+    """The manifest dict, or None if the artifact has none."""
+    path = manifest_path(model_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_model(model_path, classes, num_outputs=None):
+    """
+    Check that an artifact predicts ``classes`` in that order.
+
+    Raises ManifestError on a mismatch; returns the manifest (None for older
+    models without one, which are then only checked by ``num_outputs``).
+    """
+    manifest = read_manifest(model_path)
+    if manifest is not None:
+        if manifest["classes"] != list(classes):
+            raise ManifestError(
+                f"{os.path.basename(model_path)} was trained for {manifest['classes']}, "
+                f"expected {list(classes)}"
+            )
+        if manifest.get("sha256") and manifest["sha256"] != file_sha256(model_path):
+            raise ManifestError(
+                f"{os.path.basename(model_path)} changed after its manifest was written; "
+                f"retrain or re-export it"
+            )
+    if num_outputs is not None and num_outputs != len(classes):
+        raise ManifestError(
+            f"{os.path.basename(model_path)} has {num_outputs} outputs, expected {len(classes)}"
+        )
+    return manifest
+
+
+def _format_of(model_path):
+    name = os.path.basename(model_path).lower()
+    if name.endswith(".tflite"):
+        return "tflite-int8" if "int8" in name else "tflite"
+    if name.endswith(".onnx"):
+        return "onnx"
+    return "keras"
@@ -1,76 +1,23 @@
-import os
-import numpy as np
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-from tensorflow.keras.optimizers import Adam
-from tensorflow.keras.models import load_model
-
-# ----- PATHS -----
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = script_dir
-train_dir = os.path.join(project_root, "dataset", "train")
-model_dir = os.path.join(project_root, "model")
-os.makedirs(model_dir, exist_ok=True)
-model_path = os.path.join(model_dir, "emotion_model.h5")
-
-# ----- CHECK IF TRAIN DATA EXISTS -----
-if os.path.exists(train_dir) and any(os.listdir(train_dir)):
-    print("✅ Found training dataset. Using ImageDataGenerator...")
-
-    # Data generator
-    datagen = ImageDataGenerator(rescale=1./255)
+"""
+Quick training run with the compact (2 conv block) network.
 
-    train_data = datagen.flow_from_directory(
-        train_dir,
-        target_size=(48,48),
-        color_mode="grayscale",
-        batch_size=32,
-        class_mode="categorical"
-    )
+Shortcut for:
 
-    # Build CNN
-    model = Sequential([
-        Conv2D(32, (3,3), activation='relu', input_shape=(48,48,1)),
-        MaxPooling2D((2,2)),
-        Conv2D(64, (3,3), activation='relu'),
-        MaxPooling2D((2,2)),
-        Flatten(),
-        Dense(128, activation='relu'),
-        Dense(5, activation='softmax')
-    ])
+    python model/train_model.py --architecture compact --epochs 3
 
-    # Compile
-    model.compile(optimizer=Adam(), loss='categorical_crossentropy', metrics=['accuracy'])
-
-    # Train
-    model.fit(train_data, epochs=3)
-
-else:
-    print("⚠ Training dataset not found or empty. Using dummy random data for testing...")
-
-    # Dummy data (100 grayscale images, 5 classes)
-    X_train = np.random.rand(100, 48,48,1)
-    y_train = np.random.randint(0,5,100)
-    y_train = np.eye(5)[y_train]
+Extra arguments are passed on to model/train_model.py. There is no fallback
+to random data any more: without dataset/train (or a packed dataset) the
+run stops with an error instead of saving a meaningless model.
+"""
+import os
+import sys
 
-    # Build CNN
-    model = Sequential([
-        Conv2D(32, (3,3), activation='relu', input_shape=(48,48,1)),
-        MaxPooling2D((2,2)),
-        Conv2D(64, (3,3), activation='relu'),
-        MaxPooling2D((2,2)),
-        Flatten(),
-        Dense(128, activation='relu'),
-        Dense(5, activation='softmax')
-    ])
+script_dir = os.path.dirname(os.path.abspath(__file__))
 
-    # Compile
-    model.compile(optimizer=Adam(), loss='categorical_crossentropy', metrics=['accuracy'])
+# Allow importing the training entry point from model/
+sys.path.insert(0, os.path.join(script_dir, "model"))
+from train_model import main
 
-    # Train
-    model.fit(X_train, y_train, epochs=3, batch_size=10)
 
-# ----- SAVE MODEL -----
-model.save(model_path)
-print(f"✅ Model saved successfully at {model_path}")
\ No newline at end of file
+if __name__ == "__main__":
+    main(["--architecture", "compact", "--epochs", "3"] + sys.argv[1:])
@@ -1,19 +1,34 @@
 import cv2
 import numpy as np
-from tensorflow.keras.models import load_model
+
+from inference import CLASSES, crop_faces, default_model_path, load_backend
+from model_manifest import verify_model
+from face_detection import FaceDetector
+from face_tracking import DetectionScheduler
 
 # Load the trained model
 import os
 script_dir = os.path.dirname(os.path.abspath(__file__))
-model_path = os.path.join(script_dir, 'model', 'emotion_model.h5')
-model = load_model(model_path)
+model_path = default_model_path(os.path.join(script_dir, 'model'))
+predictor = load_backend(model_path)
 
 # Emotion classes
-classes = ['angry', 'happy', 'neutral', 'sad', 'surprise']
+classes = CLASSES
+verify_model(model_path, classes)
+
+# Face detection mode: "full", "downscale" or "roi" (see face_detection.py)
+DETECTION_MODE = "roi"
+DETECTION_SCALE = 2.0
 
 # Initialize webcam
 cap = cv2.VideoCapture(0)
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+# Adjusted scaleFactor and minNeighbors for better detection
+face_detector = FaceDetector(mode=DETECTION_MODE, scale=DETECTION_SCALE,
+                             scale_factor=1.1, min_neighbors=4)
+
+# Run the cascade every 5th frame and track faces in between
+detection = DetectionScheduler(face_detector.detect, interval=5)
+predictions = []
 
 print("Webcam running... Press 'q' to quit.")
 
@@ -25,16 +40,14 @@ while True:
 
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
 
-    # Adjusted scaleFactor and minNeighbors for better detection
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4)
+    faces, detected = detection.process(gray)
 
-    for (x, y, w, h) in faces:
-        roi_gray = gray[y:y + h, x:x + w]
-        roi_gray = cv2.resize(roi_gray, (48, 48))
-        roi = roi_gray.reshape(1, 48, 48, 1) / 255.0
+    # Predict emotions for every face in one batch; tracked frames reuse the
+    # last predictions (the tracker keeps the detection's face order)
+    if detected:
+        predictions = predictor(crop_faces(gray, faces))
 
-        # Predict emotion
-        prediction = model.predict(roi)
+    for (x, y, w, h), prediction in zip(faces, predictions):
         predicted_class = classes[np.argmax(prediction)]
         confidence = np.max(prediction) * 100  # Convert to percentage
 
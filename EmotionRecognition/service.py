@@ -0,0 +1,363 @@
+"""
+Local HTTP service for the emotion -> dua pipeline (no GUI).
+
+    python service.py                          # http://127.0.0.1:8080
+    python service.py --workers 2 --port 9000
+
+Endpoints (JSON responses):
+
+    GET  /health      model, workers and micro-batching statistics
+    POST /v1/text     {"text": "..."}                  -> emotion + dua
+    POST /v1/image    raw image bytes (jpg/png)        -> faces + emotion/dua of the largest face
+                      ?detect=0 takes the image as an already cropped face
+    POST /v1/batch    {"texts": [...], "images": [base64, ...], "detect": true}
+                                                       -> {"texts": [...], "images": [...]}
+
+Images are scored in a pool of worker processes, each with its own copy of
+the model (engine.FaceScorer). Concurrent image requests are micro-batched:
+while a worker is free, the first waiting image opens a batch that collects
+more for up to --max-delay-ms (or --max-batch images), and the whole batch
+is one model call in one worker. When every worker is busy, requests keep
+queueing and go out together as soon as one frees up. Text is cheap and is
+classified in the service process.
+
+Only the standard library (asyncio) is used for HTTP; load_test.py
+measures throughput and latency against localhost.
+"""
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import cv2
+
+from engine import FaceScorer, RecommendationEngine
+
+STATUS_TEXT = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+# Per-process state set by _init_worker
+_scorer = None
+_startup_barrier = None
+
+
+def _init_worker(model_path, detection_scale, threads, startup_barrier):
+    global _scorer, _startup_barrier
+    cv2.setNumThreads(1)  # parallelism comes from the pool
+    _scorer = FaceScorer(model_path, detection_scale=detection_scale, num_threads=threads)
+    _startup_barrier = startup_barrier
+
+
+def _worker_ready():
+    """
+    Startup task, submitted once per worker. Every call blocks until all
+    workers are inside it, so the calls must run in different processes:
+    the pool has to start (and load the model in) every worker up front.
+    """
+    _startup_barrier.wait()
+    return os.getpid(), os.path.basename(_scorer.model_path)
+
+
+def _score_batch(images, detect):
+    """Worker task: encoded images (+ per-image detect flags) -> faces per image."""
+    return _scorer.score(images, detect)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """Groups concurrent image requests into one worker call."""
+
+    def __init__(self, pool, workers, max_batch=32, max_delay=0.005):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(workers)  # batches in flight
+        self._task = asyncio.ensure_future(self._dispatch())
+        self.batches = 0
+        self.images = 0
+
+    async def score(self, image, detect=True):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, detect, future))
+        return await future
+
+    async def close(self):
+        self._task.cancel()
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            # Wait for a free worker; meanwhile more requests queue up
+            await self._slots.acquire()
+            batch = [first]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        self.batches += 1
+        self.images += len(batch)
+        try:
+            results = await loop.run_in_executor(
+                self.pool, _score_batch, [image for image, _, _ in batch], [d for _, d, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():  # client may have gone away
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+
+class EmotionService:
+    def __init__(self, engine, batcher, workers, model_name, max_body):
+        self.engine = engine
+        self.batcher = batcher
+        self.workers = workers
+        self.model_name = model_name
+        self.max_body = max_body
+        self.requests = 0
+        self.started = time.time()
+
+    # ---------- HTTP ----------
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                # Until the body has been read, any error closes the connection:
+                # unread body bytes would be parsed as the next request
+                keep_alive = False
+                try:
+                    method, target, headers, wants_keep_alive = self._parse_head(head)
+                    try:
+                        length = int(headers.get("content-length", 0) or 0)
+                    except ValueError:
+                        raise HTTPError(400, "invalid Content-Length")
+                    if length < 0:
+                        raise HTTPError(400, "invalid Content-Length")
+                    if length > self.max_body:
+                        raise HTTPError(413, f"body larger than {self.max_body} bytes")
+                    body = await reader.readexactly(length) if length else b""
+                    keep_alive = wants_keep_alive
+                    status, payload = 200, await self.route(method, target, headers, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                self.requests += 1
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head):
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(400, "chunked bodies are not supported; send Content-Length")
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return method.upper(), target, headers, keep_alive
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    # ---------- endpoints ----------
+    async def route(self, method, target, headers, body):
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        routes = {
+            "/health": ("GET", self.health),
+            "/v1/text": ("POST", self.text),
+            "/v1/image": ("POST", self.image),
+            "/v1/batch": ("POST", self.batch),
+        }
+        if url.path not in routes:
+            raise HTTPError(404, f"unknown endpoint {url.path}")
+        allowed, handler = routes[url.path]
+        if method != allowed:
+            raise HTTPError(405, f"{url.path} only accepts {allowed}")
+        return await handler(query, headers, body)
+
+    async def health(self, query, headers, body):
+        batches = self.batcher.batches
+        return {
+            "status": "ok",
+            "model": self.model_name,
+            "workers": self.workers,
+            "requests": self.requests,
+            "image_batches": batches,
+            "images": self.batcher.images,
+            "mean_batch_size": round(self.batcher.images / batches, 2) if batches else 0.0,
+            "uptime_sec": round(time.time() - self.started, 1),
+        }
+
+    async def text(self, query, headers, body):
+        text = _json_body(body).get("text")
+        if not isinstance(text, str):
+            raise HTTPError(400, 'expected {"text": "..."}')
+        return self.engine.recommend_text(text)
+
+    async def image(self, query, headers, body):
+        if headers.get("content-type", "").startswith("application/json"):
+            data = _json_body(body)
+            image, detect = _decode_image(data.get("image")), bool(data.get("detect", True))
+        else:
+            image = body
+            detect = query.get("detect", ["1"])[0].lower() not in ("0", "false", "no")
+        if not image:
+            raise HTTPError(400, "empty image")
+        faces = await self.batcher.score(image, detect)
+        result = self.engine.recommend_faces(faces)
+        if "error" in result:
+            raise HTTPError(400, result["error"])
+        return result
+
+    async def batch(self, query, headers, body):
+        data = _json_body(body)
+        texts, images = data.get("texts", []), data.get("images", [])
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            raise HTTPError(400, '"texts" must be a list of strings')
+        if not isinstance(images, list):
+            raise HTTPError(400, '"images" must be a list of base64 strings')
+        detect = bool(data.get("detect", True))
+        decoded = [_decode_image(image) for image in images]
+
+        # All images enter the batcher at once, so they share worker calls
+        scored = asyncio.gather(*(self.batcher.score(image, detect) for image in decoded))
+        loop = asyncio.get_running_loop()
+        # Large text batches are classified off the event loop
+        text_results = await loop.run_in_executor(None, self.engine.recommend_texts, texts)
+        image_results = [self.engine.recommend_faces(faces) for faces in await scored]
+        return {"texts": text_results, "images": image_results}
+
+
+def _json_body(body):
+    try:
+        data = json.loads(body or b"{}")
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPError(400, "body is not valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "expected a JSON object")
+    return data
+
+
+def _decode_image(value):
+    if not isinstance(value, str):
+        raise HTTPError(400, "images must be base64 strings")
+    try:
+        image = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPError(400, "invalid base64 image")
+    if not image:
+        raise HTTPError(400, "empty image")
+    return image
+
+
+async def serve(args):
+    loop = asyncio.get_running_loop()
+    # "spawn" keeps the workers free of the service's threads (and matches Windows)
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(
+        args.workers, mp_context=context, initializer=_init_worker,
+        initargs=(args.model, args.detection_scale, args.threads, context.Barrier(args.workers)),
+    )
+    print(f"Loading the model in {args.workers} worker process(es)...")
+    workers = await asyncio.gather(*(loop.run_in_executor(pool, _worker_ready) for _ in range(args.workers)))
+    model_name = workers[0][1]
+    print(f"✅ Model: {model_name}, loaded in {len({pid for pid, _ in workers})} workers")
+
+    engine = RecommendationEngine()
+    batcher = MicroBatcher(pool, args.workers, args.max_batch, args.max_delay_ms / 1000.0)
+    service = EmotionService(engine, batcher, args.workers, model_name, args.max_body_mb * 1024 * 1024)
+    server = await asyncio.start_server(service.handle_connection, args.host, args.port,
+                                        limit=64 * 1024)
+    print(f"🚀 Serving on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.close()
+        pool.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the emotion -> dua pipeline over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--model', default=None, help="Default: the GUI's model choice")
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help="Inference processes, one model copy each")
+    parser.add_argument('--threads', type=int, default=1, help="Inference threads per worker (TFLite/ONNX)")
+    parser.add_argument('--max-batch', type=int, default=32, help="Images per worker call")
+    parser.add_argument('--max-delay-ms', type=float, default=5.0,
+                        help="How long a batch waits for more requests")
+    parser.add_argument('--detection-scale', type=float, default=1.0,
+                        help="Downscale factor before detection (1.0: full resolution)")
+    parser.add_argument('--max-body-mb', type=int, default=16)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\n👋 Service stopped")
+
+
+if __name__ == '__main__':
+    main()
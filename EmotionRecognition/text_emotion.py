@@ -0,0 +1,178 @@
+"""
+Keyword-based emotion classification of free text.
+
+The lexicon (text_emotion_lexicon.json, or any file with the same layout)
+is compiled once into a token trie, so multi-word phrases ("fed up") and
+single words share one index. A text is tokenized once and every position
+walks the trie, which keeps a lookup linear in the length of the text and
+only ever matches whole words ("mad" does not match "made").
+
+Every emotion is scored. A keyword within ``negation_window`` tokens after
+a negation ("not", "don't", ...) in the same clause counts for its
+``negation_targets`` emotion instead ("not happy" -> sad), or not at all.
+
+Texts without any keyword can fall back to the learned model in
+text_model.py (hashed n-grams), so "my grandmother passed away" is not
+simply neutral. Only if neither is sure does the lexicon default apply.
+
+    python text_emotion.py journal.txt            # one entry per line -> CSV
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+from text_model import DEFAULT_TEXT_MODEL, TextEmotionModel
+
+DEFAULT_LEXICON = os.path.join(os.path.dirname(os.path.abspath(__file__)), "text_emotion_lexicon.json")
+
+# Words (with inner apostrophes) and clause punctuation
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[.,;:!?]")
+_CLAUSE_END = frozenset(".,;:!?")
+_END = object()  # trie key marking the end of a keyword
+
+
+def tokenize(text):
+    text = text.lower().replace("’", "'")
+    return _TOKEN_RE.findall(text)
+
+
+class TextEmotionClassifier:
+    def __init__(self, lexicon_path=DEFAULT_LEXICON, model=None, min_confidence=0.5):
+        """
+        ``model`` is an optional TextEmotionModel for texts without keywords;
+        its prediction is used when its top probability reaches ``min_confidence``.
+        """
+        with open(lexicon_path, "r", encoding="utf-8") as f:
+            self._compile(json.load(f))
+        self.model = model
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def from_dict(cls, lexicon, model=None, min_confidence=0.5):
+        classifier = cls.__new__(cls)
+        classifier._compile(lexicon)
+        classifier.model = model
+        classifier.min_confidence = min_confidence
+        return classifier
+
+    def _compile(self, lexicon):
+        self.emotions = tuple(lexicon["emotions"])
+        self.default = lexicon.get("default", "neutral")
+        self.negations = frozenset(lexicon.get("negations", ()))
+        self.negation_window = int(lexicon.get("negation_window", 3))
+        self.negation_targets = dict(lexicon.get("negation_targets", {}))
+        self.scope_breakers = frozenset(lexicon.get("scope_breakers", ())) | _CLAUSE_END
+
+        self._trie = {}
+        for emotion, keywords in lexicon["emotions"].items():
+            for keyword in keywords:
+                # Plain strings weigh 1.0; {"text": ..., "weight": ...} sets a weight
+                if isinstance(keyword, dict):
+                    keyword, weight = keyword["text"], float(keyword.get("weight", 1.0))
+                else:
+                    weight = 1.0
+                node = self._trie
+                for token in tokenize(keyword):
+                    node = node.setdefault(token, {})
+                node.setdefault(_END, []).append((emotion, weight))
+
+    # --------------------------------------------------
+    def scores(self, text):
+        """{emotion: score} for every emotion in the lexicon."""
+        tokens = tokenize(text)
+        scores = dict.fromkeys(self.emotions, 0.0)
+        negated_until = -1
+
+        for i, token in enumerate(tokens):
+            if token in self.scope_breakers:
+                negated_until = -1
+                continue
+            if token in self.negations:
+                negated_until = i + self.negation_window
+                continue
+
+            node = self._trie.get(token)
+            j = i
+            while node is not None:
+                for emotion, weight in node.get(_END, ()):
+                    if i <= negated_until:
+                        emotion = self.negation_targets.get(emotion)
+                    if emotion is not None:
+                        scores[emotion] += weight
+                j += 1
+                node = node.get(tokens[j]) if j < len(tokens) else None
+        return scores
+
+    def match(self, text):
+        """(emotion, scores) for the best keyword match, or (None, scores) if nothing matched."""
+        scores = self.scores(text)
+        # Ties go to the emotion listed first in the lexicon
+        best = max(self.emotions, key=lambda e: scores[e])
+        return (best if scores[best] > 0 else None), scores
+
+    def classify(self, text, default=None):
+        return self.classify_batch([text], default)[0]
+
+    def classify_batch(self, texts, default=None):
+        """Keyword matches first; the rest go through the model in one batch."""
+        emotions = [self.match(text)[0] for text in texts]
+        if self.model is not None:
+            unmatched = [i for i, emotion in enumerate(emotions) if emotion is None]
+            if unmatched:
+                predicted = self.model.predict([texts[i] for i in unmatched], self.min_confidence)
+                for i, emotion in zip(unmatched, predicted):
+                    emotions[i] = emotion
+        default = default or self.default
+        return [emotion or default for emotion in emotions]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify text entries (one per line) by emotion")
+    parser.add_argument("inputs", nargs="*", help="Text files (default: stdin)")
+    parser.add_argument("--lexicon", default=DEFAULT_LEXICON)
+    parser.add_argument("--model", default=DEFAULT_TEXT_MODEL,
+                        help="Text model for entries without keywords (skipped if missing)")
+    parser.add_argument("--no-model", action="store_true", help="Keywords only")
+    parser.add_argument("--min-confidence", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--output", default=None, help="CSV file (default: stdout)")
+    args = parser.parse_args()
+
+    model = None
+    if not args.no_model and os.path.exists(args.model):
+        model = TextEmotionModel.load(args.model)
+    classifier = TextEmotionClassifier(args.lexicon, model, args.min_confidence)
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(["emotion", "text"])
+    counts = Counter()
+
+    def flush(lines):
+        for emotion, line in zip(classifier.classify_batch(lines), lines):
+            counts[emotion] += 1
+            writer.writerow([emotion, line])
+        lines.clear()
+
+    lines = []
+    files = [open(path, "r", encoding="utf-8") for path in args.inputs] or [sys.stdin]
+    for f in files:
+        for line in f:
+            line = line.strip()
+            if line:
+                lines.append(line)
+                if len(lines) >= args.batch_size:
+                    flush(lines)
+        if f is not sys.stdin:
+            f.close()
+    flush(lines)
+    if args.output:
+        out.close()
+    print(", ".join(f"{e}: {n}" for e, n in counts.most_common()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Small learned text emotion model (hashed n-grams + linear softmax).
+
+Each text becomes a sparse bag of hashed features:
+
+    word unigrams and bigrams        "not", "not sleep"
+    character 3- and 4-grams         " sle", "slee", "leep" (typos, word forms)
+
+hashed (crc32, stable across runs) into ``n_features`` buckets and
+L2-normalized. A linear layer over the five emotion classes turns them into
+probabilities. Prediction is vectorized over a whole batch of texts, and
+the model is a plain .npz that loads in a few milliseconds.
+
+Trained with model/train_text_model.py; used by text_emotion.py when no
+lexicon keyword matches.
+"""
+import os
+import re
+import zlib
+
+import numpy as np
+
+DEFAULT_TEXT_MODEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model", "text_emotion_model.npz")
+DEFAULT_N_FEATURES = 1 << 18
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_CHAR_NGRAMS = (3, 4)
+
+
+class TextFeaturizer:
+    def __init__(self, n_features=DEFAULT_N_FEATURES):
+        self.n_features = int(n_features)
+        self._hashes = {}  # feature string -> bucket, shared by all texts
+
+    def _bucket(self, feature):
+        bucket = self._hashes.get(feature)
+        if bucket is None:
+            bucket = zlib.crc32(feature.encode("utf-8")) % self.n_features
+            if len(self._hashes) < 500_000:
+                self._hashes[feature] = bucket
+        return bucket
+
+    def features(self, text):
+        """Sorted unique feature buckets of one text."""
+        words = _WORD_RE.findall(text.lower().replace("’", "'"))
+        feats = [f"w:{w}" for w in words]
+        feats += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f" {w} "
+            for n in _CHAR_NGRAMS:
+                feats += [f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1)]
+        return sorted({self._bucket(f) for f in feats})
+
+    def transform(self, texts):
+        return to_sparse([self.features(text) for text in texts])
+
+
+def to_sparse(feature_lists):
+    """
+    Sparse batch as (rows, cols, values): feature ``cols[k]`` of text
+    ``rows[k]`` with weight ``values[k]`` (each text L2-normalized).
+    """
+    rows, cols, values = [], [], []
+    for i, buckets in enumerate(feature_lists):
+        if buckets:
+            rows.append(np.full(len(buckets), i, dtype=np.int64))
+            cols.append(np.asarray(buckets, dtype=np.int64))
+            values.append(np.full(len(buckets), 1.0 / np.sqrt(len(buckets)), dtype=np.float32))
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float32)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+
+def sparse_logits(rows, cols, values, weights, bias, num_texts):
+    """(num_texts, num_classes) logits of a (rows, cols, values) batch."""
+    logits = np.tile(bias.astype(np.float32), (num_texts, 1))
+    contributions = weights[cols] * values[:, np.newaxis]
+    for c in range(logits.shape[1]):
+        logits[:, c] += np.bincount(rows, weights=contributions[:, c], minlength=num_texts)
+    return logits
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class TextEmotionModel:
+    def __init__(self, classes, weights, bias, n_features=DEFAULT_N_FEATURES):
+        self.classes = list(classes)
+        self.weights = weights
+        self.bias = bias
+        self.featurizer = TextFeaturizer(n_features)
+
+    @classmethod
+    def load(cls, path=DEFAULT_TEXT_MODEL):
+        with np.load(path) as data:
+            n_features = int(data["n_features"])
+            classes = [str(c) for c in data["classes"]]
+            # Only rows that were ever trained are stored; the rest are zero
+            weights = np.zeros((n_features, len(classes)), dtype=np.float32)
+            weights[data["rows"]] = data["row_weights"]
+            bias = data["bias"].astype(np.float32)
+        return cls(classes, weights, bias, n_features)
+
+    def save(self, path):
+        rows = np.flatnonzero(np.any(self.weights != 0, axis=1))
+        np.savez(path, classes=np.array(self.classes), n_features=self.featurizer.n_features,
+                 rows=rows, row_weights=self.weights[rows], bias=self.bias)
+
+    def predict_proba(self, texts):
+        texts = list(texts)
+        rows, cols, values = self.featurizer.transform(texts)
+        return softmax(sparse_logits(rows, cols, values, self.weights, self.bias, len(texts)))
+
+    def predict(self, texts, min_confidence=0.0):
+        """Class name per text, or None where the top probability is below ``min_confidence``."""
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [self.classes[b] if probs[i, b] >= min_confidence else None
+                for i, b in enumerate(best)]
@@ -0,0 +1,101 @@
+"""
+In-memory cache of decoded dua recitations.
+
+``pyglet.media.load(path)`` demuxes and decodes the .mp4 again on every
+play. Here each file is decoded once with ``streaming=False`` into a
+StaticSource (raw PCM in memory), which pyglet can queue any number of times
+and which starts playing almost immediately.
+
+The recitations are preloaded on a background thread at startup. Entries
+are kept in LRU order and evicted when the decoded audio exceeds
+``max_bytes``; a file that changed on disk is decoded again.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+
+def _load_static(path):
+    import pyglet
+
+    return pyglet.media.load(path, streaming=False)
+
+
+def _source_size(source):
+    """Bytes of decoded PCM held by a StaticSource."""
+    fmt = source.audio_format
+    if fmt is None or not source.duration:
+        return 0
+    bytes_per_second = fmt.sample_rate * fmt.channels * fmt.sample_size // 8
+    return int(source.duration * bytes_per_second)
+
+
+class AudioCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, loader=_load_static):
+        self.max_bytes = max_bytes
+        self._loader = loader
+        self._entries = OrderedDict()  # path -> (mtime, source, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}  # path -> Event, so a file is never decoded twice at once
+
+    def preload(self, paths):
+        """Decode ``paths`` on a background thread."""
+        thread = threading.Thread(target=self._preload, args=(list(paths),),
+                                  name="audio-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def get(self, path):
+        """The decoded source for ``path`` (decoding it now on a cache miss)."""
+        mtime = os.path.getmtime(path)
+        while True:
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry and entry[0] == mtime:
+                    self._entries.move_to_end(path)
+                    return entry[1]
+                pending = self._loading.get(path)
+                if pending is None:
+                    pending = self._loading[path] = threading.Event()
+                    break
+            # Another thread is decoding this file; use its result
+            pending.wait()
+
+        try:
+            source = self._loader(path)
+            self._store(path, mtime, source)
+            return source
+        finally:
+            with self._lock:
+                del self._loading[path]
+            pending.set()
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    # --------------------------------------------------
+    def _preload(self, paths):
+        for path in paths:
+            try:
+                self.get(path)
+            except Exception as e:
+                print(f"⚠️ Could not preload audio {os.path.basename(path)}: {e}")
+
+    def _store(self, path, mtime, source):
+        size = _source_size(source)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old:
+                self._bytes -= old[2]
+            if size > self.max_bytes:
+                return  # too large to cache; played uncached
+            self._entries[path] = (mtime, source, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
@@ -0,0 +1,177 @@
+"""
+Event-driven audio playback for the GUI.
+
+One long-lived worker thread owns the pyglet player and takes commands
+from a queue:
+
+    play(path)   start ``path`` from the beginning (or resume it if paused)
+    pause()      pause, keeping the position
+    stop()       stop and forget the current track
+    seek(sec)    jump to a position in the current track
+
+Between commands the worker blocks in ``queue.get(timeout=...)`` with the
+timeout set to the time left in the current track, so it wakes up exactly
+when the recitation ends (or a new command arrives) instead of polling.
+For a source of unknown duration it wakes up every ``EOS_POLL_INTERVAL``
+seconds instead and checks for the player's ``on_eos`` event.
+State changes reach the GUI thread through Qt signals; the GUI never
+touches the player itself.
+"""
+import queue
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+PLAYING = "playing"
+PAUSED = "paused"
+STOPPED = "stopped"
+
+# Seconds between end-of-stream checks for sources that report no duration
+EOS_POLL_INTERVAL = 0.5
+
+
+class AudioEngine(QObject):
+    # New state ("playing", "paused", "stopped") and the track path ("" when stopped)
+    state_changed = pyqtSignal(str, str)
+    # Track played to the end
+    finished = pyqtSignal(str)
+    # Error message if a track could not be loaded or played
+    failed = pyqtSignal(str)
+
+    def __init__(self, audio_cache, parent=None):
+        super().__init__(parent)
+        self.audio_cache = audio_cache
+        self._commands = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="audio-engine", daemon=True)
+        self._thread.start()
+
+    # ---------- commands (any thread) ----------
+    def play(self, path):
+        self._commands.put(("play", path))
+
+    def pause(self):
+        self._commands.put(("pause", None))
+
+    def stop(self):
+        self._commands.put(("stop", None))
+
+    def seek(self, seconds):
+        self._commands.put(("seek", float(seconds)))
+
+    def shutdown(self, timeout=1.0):
+        self._commands.put(("shutdown", None))
+        self._thread.join(timeout)
+
+    # ---------- worker ----------
+    def _run(self):
+        self._player = None
+        self._path = None
+        self._state = STOPPED
+        self._duration = 0.0
+        self._offset = 0.0    # position when playback last (re)started
+        self._started = 0.0   # monotonic time of that (re)start
+        self._eos = False     # set by the player's on_eos event
+
+        while True:
+            try:
+                command, arg = self._commands.get(timeout=self._remaining())
+            except queue.Empty:
+                if not self._duration and not self._reached_eos():
+                    continue  # unknown duration and still playing: poll again
+                # Woke up because the track ran out
+                path = self._path
+                self._release()
+                self._set_state(STOPPED)
+                self.finished.emit(path or "")
+                continue
+
+            try:
+                if command == "shutdown":
+                    self._release()
+                    return
+                getattr(self, f"_{command}")(arg)
+            except Exception as e:
+                self._release()
+                self._set_state(STOPPED)
+                self.failed.emit(str(e))
+
+    def _remaining(self):
+        """Seconds until the current track ends; None (wait forever) when not playing."""
+        if self._state != PLAYING:
+            return None
+        if not self._duration:
+            return EOS_POLL_INTERVAL
+        position = self._offset + time.monotonic() - self._started
+        return max(self._duration - position, 0.0)
+
+    def _play(self, path):
+        if self._state == PAUSED and path == self._path:
+            self._player.play()
+        else:
+            import pyglet
+
+            source = self.audio_cache.get(path)
+            self._release()
+            self._player = pyglet.media.Player()
+            self._player.push_handlers(on_eos=self._on_eos)
+            self._player.queue(source)
+            self._player.play()
+            self._path, self._duration, self._offset = path, source.duration or 0.0, 0.0
+        self._started = time.monotonic()
+        self._set_state(PLAYING)
+
+    def _on_eos(self):
+        self._eos = True
+
+    def _reached_eos(self):
+        """True once the player reported the end of a source of unknown duration."""
+        if not self._eos:
+            # pyglet posts on_eos to its app event loop, which this GUI never runs;
+            # dispatch the posted events here, on the thread that owns the player
+            try:
+                import pyglet.app
+
+                pyglet.app.platform_event_loop.dispatch_posted_events()
+            except Exception:
+                pass
+        return self._eos
+
+    def _pause(self, _):
+        if self._state != PLAYING:
+            return
+        self._player.pause()
+        self._offset += time.monotonic() - self._started
+        self._set_state(PAUSED)
+
+    def _stop(self, _):
+        if self._state == STOPPED:
+            return
+        self._release()
+        self._set_state(STOPPED)
+
+    def _seek(self, seconds):
+        if self._player is None:
+            return
+        seconds = max(seconds, 0.0)
+        if self._duration:
+            seconds = min(seconds, self._duration)
+        self._player.seek(seconds)
+        self._eos = False
+        self._offset, self._started = seconds, time.monotonic()
+
+    def _release(self):
+        if self._player is not None:
+            try:
+                self._player.pause()
+                self._player.delete()
+            except Exception:
+                pass
+        self._player = None
+        self._path = None
+        self._duration = 0.0
+        self._eos = False
+
+    def _set_state(self, state):
+        self._state = state
+        self.state_changed.emit(state, self._path or "")
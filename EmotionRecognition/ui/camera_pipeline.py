@@ -0,0 +1,208 @@
+"""
+Threaded capture -> detect -> infer pipeline for the live camera feed.
+
+Every stage runs on its own worker thread and hands work to the next one
+through a single-slot queue. When a stage is still busy with the previous
+item, the pending item is replaced by the newest one, so a slow detector or
+model drops stale frames instead of backing up the preview.
+
+The preview works the same way: the newest frame sits in a single slot and
+``frame_ready`` is emitted only once the GUI has taken the previous one
+(``take_frame``), so a stalled GUI thread never builds up a queue of frames.
+
+Results reach the GUI thread only through Qt signals. A failing detection or
+model call skips that frame and is reported through ``failed``; the workers
+keep running. Per-frame predictions
+are smoothed per face, and ``emotion_changed`` fires only when the stable
+emotion of the main face actually changes.
+
+The cascade only runs every few frames; in between, faces are followed by a
+cheap tracker and keep their last classification, so tracked frames skip
+the model entirely.
+"""
+import queue
+import threading
+
+import cv2
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from inference import crop_faces
+from emotion_smoothing import EmotionTracker
+from face_tracking import DetectionScheduler
+
+
+def put_latest(q: queue.Queue, item):
+    """Put ``item`` into a bounded queue, discarding stale entries if it is full."""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class CameraPipeline(QObject):
+    # A new BGR frame is waiting; fetch it with take_frame()
+    frame_ready = pyqtSignal()
+    # List of dicts: {"track_id", "box": (x, y, w, h), "emotion": str, "confidence": float}
+    faces_ready = pyqtSignal(object)
+    # New stable emotion of the main (largest) face
+    emotion_changed = pyqtSignal(str)
+    # Error message of a failed detection/inference step (the worker keeps running)
+    failed = pyqtSignal(str)
+
+    _POLL_INTERVAL = 0.1  # seconds, how often idle workers check for stop
+
+    def __init__(self, predictor, classes, face_detector, camera_index=0,
+                 detect_interval=5, parent=None):
+        super().__init__(parent)
+        self.predictor = predictor
+        self.classes = classes
+        self.face_detector = face_detector
+        self.camera_index = camera_index
+        self.detection = DetectionScheduler(face_detector.detect, interval=detect_interval)
+        self.emotion_tracker = EmotionTracker(classes)
+        # Shared by the detect worker (tracked frames) and the infer worker
+        self._tracker_lock = threading.Lock()
+
+        self._frame_lock = threading.Lock()
+        self._latest_frame = None
+        self._frame_pending = False  # frame_ready emitted, frame not taken yet
+        self._detect_queue = queue.Queue(maxsize=1)
+        self._infer_queue = queue.Queue(maxsize=1)
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._last_error = None
+
+    # --------------------------------------------------
+    def start(self) -> bool:
+        """Open the camera and start the worker threads. Returns False if no camera."""
+        if self._threads:
+            return True
+
+        cap = cv2.VideoCapture(self.camera_index)
+        if not cap.isOpened():
+            cap.release()
+            return False
+
+        # A fresh event per run, so a worker still finishing an old run never sees it cleared
+        self._stop_event = threading.Event()
+        self.detection.reset()
+        self.emotion_tracker.reset()
+        self._last_error = None
+        with self._frame_lock:
+            self._latest_frame, self._frame_pending = None, False
+        for name, target, args in (
+            ("capture", self._capture_loop, (cap, self._stop_event)),
+            ("detect", self._detect_loop, (self._stop_event,)),
+            ("infer", self._infer_loop, (self._stop_event,)),
+        ):
+            thread = threading.Thread(target=target, args=args, name=f"camera-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return True
+
+    def stop(self):
+        """Stop all workers; the capture worker releases the camera when it exits."""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+        with self._frame_lock:
+            self._latest_frame, self._frame_pending = None, False
+        for q in (self._detect_queue, self._infer_queue):
+            while not q.empty():
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+
+    def is_running(self) -> bool:
+        return bool(self._threads)
+
+    def take_frame(self):
+        """The newest frame (GUI thread), or None; allows the next frame_ready."""
+        with self._frame_lock:
+            frame, self._latest_frame = self._latest_frame, None
+            self._frame_pending = False
+        return frame
+
+    def _report_error(self, stage, error, stop_event):
+        """Emit ``failed`` once per distinct error, so a persistent one does not flood the GUI."""
+        message = f"{stage}: {type(error).__name__}: {error}"
+        if message != self._last_error and not stop_event.is_set():
+            self._last_error = message
+            self.failed.emit(message)
+
+    # --------------------------------------------------
+    # Worker loops
+    # --------------------------------------------------
+    def _capture_loop(self, cap, stop_event):
+        try:
+            while not stop_event.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    stop_event.wait(0.01)
+                    continue
+                with self._frame_lock:
+                    # Replace the waiting frame; signal only if the GUI took the last one
+                    self._latest_frame = frame
+                    notify, self._frame_pending = not self._frame_pending, True
+                if notify and not stop_event.is_set():
+                    self.frame_ready.emit()
+                put_latest(self._detect_queue, frame)
+        finally:
+            # Only this thread ever reads from the camera, so it releases it
+            cap.release()
+
+    def _detect_loop(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                frame = self._detect_queue.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            try:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                faces, detected = self.detection.process(gray)
+            except Exception as e:
+                # Skip the frame, like the capture loop skips failed reads
+                self._report_error("detection", e, stop_event)
+                continue
+            if detected:
+                put_latest(self._infer_queue, (gray, faces))
+                continue
+
+            # Tracked frame: move the boxes and reuse the last classification
+            with self._tracker_lock:
+                results = self.emotion_tracker.follow(faces)
+            if not stop_event.is_set():
+                self.faces_ready.emit(results)
+
+    def _infer_loop(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                gray, faces = self._infer_queue.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+            try:
+                # All faces of the frame go through the model in one batch
+                preds = self.predictor(crop_faces(gray, faces))
+                with self._tracker_lock:
+                    results, changed = self.emotion_tracker.update(faces, preds)
+            except Exception as e:
+                # Skip the frame and keep serving the next ones
+                self._report_error("inference", e, stop_event)
+                continue
+            self._last_error = None
+
+            if not stop_event.is_set():
+                self.faces_ready.emit(results)
+                if changed is not None:
+                    self.emotion_changed.emit(changed)
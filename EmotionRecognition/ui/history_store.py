@@ -0,0 +1,197 @@
+"""
+Emotion history persistence.
+
+History is kept as an append-only, line-delimited JSON log. Each line is a
+full entry with an ``id``; a later line with the same id (e.g. after
+feedback) replaces the earlier one. Writes are handed to a background thread
+that batches them into one append per flush interval, and the log is
+compacted atomically back to the newest ``max_entries`` once it grows.
+"""
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+
+class HistoryStore:
+    def __init__(self, path, max_entries=20, flush_interval=1.0, legacy_path=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        # Compact once the log holds this many lines
+        self.compact_threshold = max_entries * 5
+
+        # Entries as seen by the GUI thread (oldest first)
+        self.entries = []
+        self._next_id = 1
+
+        self._queue = queue.Queue()
+        self._wake = threading.Event()
+        self._writer = None
+        self._persisted = {}  # writer-thread view of the log, keyed by id
+        self._log_lines = 0
+
+    # --------------------------------------------------
+    # Public API (GUI thread)
+    # --------------------------------------------------
+    def load(self):
+        """(Re)load entries from disk, importing the old JSON file once if needed."""
+        self.flush()
+        records = self._read_log()
+        imported = False
+        if records is None and self.legacy_path and os.path.exists(self.legacy_path):
+            records = self._read_legacy()
+            for i, record in enumerate(records, start=1):
+                record["id"] = i
+            imported = True
+
+        merged = {}
+        for record in records or []:
+            if "id" in record:
+                merged[record["id"]] = record
+
+        self.entries = [merged[i] for i in sorted(merged)][-self.max_entries:]
+        self._next_id = max(merged, default=0) + 1
+        self._persisted = {e["id"]: dict(e) for e in self.entries}
+        self._log_lines = len(records or [])
+        if imported or self._log_lines > len(self.entries):
+            self._queue.put(("compact", None))
+            self._ensure_writer()
+        return self.entries
+
+    def add(self, emotion: str, dua_title: str):
+        """Record an emotion. Returns the new entry, or None if the emotion is unchanged."""
+        if self.entries and self.entries[-1].get("emotion") == emotion:
+            return None
+
+        entry = {
+            "id": self._next_id,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "emotion": emotion,
+            "dua_title": dua_title,
+        }
+        self._next_id += 1
+        self.entries.append(entry)
+        # Keep only latest entries in memory; the log is trimmed on compaction
+        del self.entries[:-self.max_entries]
+        self._submit(entry)
+        return entry
+
+    def set_feedback(self, helpful: bool):
+        """Attach feedback to the latest entry."""
+        if not self.entries:
+            return None
+        entry = self.entries[-1]
+        entry["helpful"] = bool(helpful)
+        self._submit(entry)
+        return entry
+
+    def flush(self):
+        """Block until every submitted entry has been written."""
+        if self._writer is not None:
+            self._wake.set()
+            self._queue.join()
+
+    def close(self):
+        """Write pending entries, compact the log and stop the writer thread."""
+        if self._writer is None:
+            return
+        self._queue.put(("compact", None))
+        self._queue.put(("stop", None))
+        self._wake.set()
+        self._writer.join()
+        self._writer = None
+
+    # --------------------------------------------------
+    # Background writer
+    # --------------------------------------------------
+    def _submit(self, entry):
+        self._queue.put(("entry", dict(entry)))
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._writer_loop, name="history-writer", daemon=True
+            )
+            self._writer.start()
+
+    def _writer_loop(self):
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            # Give the GUI a moment to queue more entries, then write them together
+            if batch[0][0] == "entry":
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            entries = [payload for kind, payload in batch if kind == "entry"]
+            compact = any(kind == "compact" for kind, _ in batch)
+            running = not any(kind == "stop" for kind, _ in batch)
+
+            try:
+                if entries:
+                    self._append(entries)
+                if compact or self._log_lines > self.compact_threshold:
+                    self._compact()
+            except OSError:
+                # Keep the app running even if disk write fails
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _append(self, entries):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self._persisted[entry["id"]] = entry
+        self._log_lines += len(entries)
+
+        for old_id in sorted(self._persisted)[:-self.max_entries]:
+            del self._persisted[old_id]
+
+    def _compact(self):
+        """Atomically rewrite the log with only the retained entries."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry_id in sorted(self._persisted):
+                f.write(json.dumps(self._persisted[entry_id], ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._log_lines = len(self._persisted)
+
+    # --------------------------------------------------
+    # Reading
+    # --------------------------------------------------
+    def _read_log(self):
+        if not os.path.exists(self.path):
+            return None
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # A torn last line from a crash; skip it
+                        continue
+        except OSError:
+            return []
+        return records
+
+    def _read_legacy(self):
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            return [r for r in records if isinstance(r, dict)]
+        except Exception:
+            return []
@@ -1,10 +1,7 @@
 import sys
 import os
-import json
-from datetime import datetime
 
 import cv2
-import numpy as np
 
 from PyQt5.QtWidgets import (
     QApplication,
@@ -19,15 +16,23 @@ from PyQt5.QtWidgets import (
     QTextEdit,
 )
 from PyQt5.QtGui import QFont, QImage, QPixmap
-from PyQt5.QtCore import Qt, QTimer, QUrl
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
+from PyQt5.QtCore import Qt
 
-from tensorflow.keras.models import load_model
+# Shared modules (inference.py, ...) live one level up in EmotionRecognition/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from inference import CLASSES, default_model_path
+from engine import RecommendationEngine
+from face_detection import FaceDetector
+from camera_pipeline import CameraPipeline
+from history_store import HistoryStore
+from model_loader import ModelLoader
+from audio_cache import AudioCache
+from audio_engine import AudioEngine, PLAYING
 
 # Audio playback using pyglet (supports .mp4 on Windows without FFmpeg)
 try:
     import pyglet
-    import threading
     PYGLET_AVAILABLE = True
 except ImportError:
     PYGLET_AVAILABLE = False
@@ -45,45 +50,93 @@ class EmotionDuaApp(QMainWindow):
         # ================= PATHS & STATE =================
         script_dir = os.path.dirname(os.path.abspath(__file__))
         project_root = os.path.join(script_dir, '..', '..')
-        model_path = os.path.join(project_root, 'EmotionRecognition', 'model', 'emotion_model.h5')
-        self.history_path = os.path.join(project_root, 'emotion_history.json')
+        # emotion_model.tflite when exported, else emotion_model.h5 (see inference.py);
+        # resolved again on every (re)load so a freshly trained model is picked up
+        self.model_dir = os.path.join(project_root, 'EmotionRecognition', 'model')
+        self.model_path = default_model_path(self.model_dir)
+        self.history_path = os.path.join(project_root, 'emotion_history.jsonl')
+        legacy_history_path = os.path.join(project_root, 'emotion_history.json')
         self.audio_dir = os.path.join(project_root, 'audio')
+        # Dua catalog and text classifier (GUI-free, shared with service.py)
+        self.engine = RecommendationEngine(self.audio_dir)
+        self.dua_catalog = self.engine.dua_catalog
 
         self.current_emotion = None
         self.current_dua = None
         self.input_mode = "camera"  # or "text"
+        self.history_store = HistoryStore(self.history_path, max_entries=20,
+                                          legacy_path=legacy_history_path)
         self.history = []
 
         self._load_history()
 
-        # ================= LOAD MODEL =================
-        self.model = load_model(model_path, compile=False)
-        print("✅ Emotion model loaded successfully")
+        # ================= MODEL =================
+        # Loaded in the background once the window is up (see _start_model_loading);
+        # the text input works without it
+        self.predictor = None
+        self.model_loader = None
 
-        self.classes = ['angry', 'happy', 'neutral', 'sad', 'surprise']
+        self.classes = list(CLASSES)
 
         # ================= FACE DETECTOR =================
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        )
+        # "roi" scans a 2x downscaled frame around known faces; "full" is the
+        # original whole-frame, full-resolution scan
+        self.face_detector = FaceDetector(mode="roi", scale=2.0)
 
-        # ================= CAMERA & TIMER =================
-        self.cap = None
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
+        # ================= CAMERA PIPELINE =================
+        # Capture, detection and inference run on worker threads; results
+        # come back through Qt signals so the GUI thread never blocks.
+        self.pipeline = None
+        self.face_results = []
 
         # ================= AUDIO PLAYER =================
         # Use pyglet for reliable audio playback (supports .mp4 on Windows)
         self.current_audio_path = None
+        # Mirrors the engine's state; only updated from its signals
         self.is_playing_audio = False
-        self.audio_player = None
-        self.audio_thread = None
-        # Timer to check audio status and update button
-        self.audio_status_timer = QTimer()
-        self.audio_status_timer.timeout.connect(self.check_audio_status)
+        # Recitations are decoded once, in the background, and kept in memory
+        self.audio_cache = AudioCache()
+        self.audio_engine = None
+        if PYGLET_AVAILABLE:
+            self.audio_cache.preload(self.dua_catalog.audio_files)
+            # One long-lived worker plays, pauses and reports the end of a track
+            self.audio_engine = AudioEngine(self.audio_cache)
+            self.audio_engine.state_changed.connect(self.on_audio_state_changed)
+            self.audio_engine.finished.connect(self.on_audio_finished)
+            self.audio_engine.failed.connect(self.on_audio_failed)
 
         # ================= UI =================
         self.init_ui()
+        self._start_model_loading()
+
+    # --------------------------------------------------
+    def _start_model_loading(self):
+        self.model_path = default_model_path(self.model_dir)
+        self.start_btn.setEnabled(False)
+        self.start_btn.setText("⏳ Loading model...")
+        self.start_btn.setToolTip("")
+        self.camera_label.setText("Loading emotion model...")
+
+        self.model_loader = ModelLoader(self.model_path, self.classes)
+        self.model_loader.loaded.connect(self.on_model_loaded)
+        self.model_loader.failed.connect(self.on_model_failed)
+        self.model_loader.start()
+
+    def on_model_loaded(self, predictor):
+        self.predictor = predictor
+        print(f"✅ Emotion model loaded successfully ({os.path.basename(self.model_path)})")
+        self.start_btn.setEnabled(True)
+        self.start_btn.setText("▶ Start camera")
+        if self.pipeline is None:
+            self.camera_label.setText("Camera Off")
+
+    def on_model_failed(self, message):
+        print(f"❌ Could not load emotion model: {message}")
+        # The button stays usable: clicking it tries to load the model again
+        self.start_btn.setEnabled(True)
+        self.start_btn.setText("⟳ Model unavailable – retry")
+        self.start_btn.setToolTip(f"Could not load {os.path.basename(self.model_path)}:\n{message}")
+        self.camera_label.setText("Emotion model not available\n(text input still works)")
 
     # --------------------------------------------------
     def init_ui(self):
@@ -473,51 +526,74 @@ class EmotionDuaApp(QMainWindow):
 
     # --------------------------------------------------
     def start_camera(self):
-        if self.cap is None:
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
+        if self.predictor is None:
+            # Only reachable after a failed load (the button is disabled while loading)
+            self._start_model_loading()
+            return
+        if self.pipeline is None:
+            pipeline = CameraPipeline(self.predictor, self.classes, self.face_detector)
+            pipeline.frame_ready.connect(self.update_frame)
+            pipeline.faces_ready.connect(self.on_faces_ready)
+            pipeline.emotion_changed.connect(self.on_emotion_changed)
+            pipeline.failed.connect(self.on_camera_failed)
+            if not pipeline.start():
                 print("❌ Camera not found")
-                self.cap = None
                 return
-            self.timer.start(30)
+            self.pipeline = pipeline
             print("▶ Camera started")
 
     # --------------------------------------------------
     def stop_camera(self):
-        self.timer.stop()
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+            self.face_results = []
             self.camera_label.setText("Camera Off")
             print("⏸ Camera stopped")
 
     # --------------------------------------------------
-    def update_frame(self):
-        if self.cap is None:
+    def on_faces_ready(self, results):
+        """Receive smoothed emotions for the latest processed frame (overlay only)."""
+        if self.pipeline is None:
             return
+        self.face_results = results
 
-        ret, frame = self.cap.read()
-        if not ret:
+    # --------------------------------------------------
+    def on_emotion_changed(self, emotion):
+        """Update the dua panel only when the stable camera emotion changes."""
+        if self.pipeline is None:
             return
+        dua = self.get_dua_for_emotion(emotion)
+        self.show_dua(dua, source_emotion=emotion)
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
-
-        for (x, y, w, h) in faces:
-            roi = gray[y:y + h, x:x + w]
-            roi = cv2.resize(roi, (48, 48))
-            roi = roi.reshape(1, 48, 48, 1).astype("float32") / 255.0
-
-            preds = self.model.predict(roi, verbose=0)
-            emotion = self.classes[np.argmax(preds)]
+    # --------------------------------------------------
+    def on_camera_failed(self, message):
+        """A detection/inference step failed; the pipeline skips the frame and keeps going."""
+        if self.pipeline is None:
+            return
+        print(f"❌ Camera pipeline error: {message}")
+        self.emotion_label.setText("Emotion: unavailable (see console)")
+        self.emotion_label.setToolTip(message)
 
-            dua = self.get_dua_for_emotion(emotion)
-            self.show_dua(dua, source_emotion=emotion)
+    # --------------------------------------------------
+    def update_frame(self):
+        """Show the newest camera frame with the most recent face annotations drawn on it."""
+        if self.pipeline is None:
+            return
+        frame = self.pipeline.take_frame()
+        if frame is None:
+            return
 
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        # Convert first so annotations never touch the frame the detector is reading
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        for face in self.face_results:
+            if face["emotion"] is None:
+                continue  # not enough frames yet for a stable emotion
+            x, y, w, h = face["box"]
+            cv2.rectangle(rgb, (x, y), (x + w, y + h), (0, 255, 0), 2)
             cv2.putText(
-                frame,
-                emotion,
+                rgb,
+                face["emotion"],
                 (x, y - 10),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.9,
@@ -525,7 +601,6 @@ class EmotionDuaApp(QMainWindow):
                 2,
             )
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
         h, w, ch = rgb.shape
         bytes_per_line = ch * w
         qt_img = QImage(rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
@@ -537,81 +612,7 @@ class EmotionDuaApp(QMainWindow):
     # --------------------------------------------------
     def get_dua_for_emotion(self, emotion: str):
         """Return structured dua info for a given emotion key."""
-        emotion = (emotion or "").lower()
-
-        # Helper function to get audio path if file exists
-        def get_audio_path(filename):
-            audio_path = os.path.join(self.audio_dir, filename)
-            if os.path.exists(audio_path):
-                return audio_path
-            return None
-
-        duas = {
-            "angry": {
-                "title": "For calming anger",
-                "arabic": "اللَّهُمَّ اغْفِرْ لِي وَأَذْهِبْ غَيْظَ قَلْبِي",
-                "english_pronunciation": "Allahumma ighfir li wa adhib ghayza qalbi",
-                "hindi_pronunciation": "अल्लाहुम्मा इग़्फिर ली व अज़्हिब ग़ैज़ा क़ल्बी",
-                "translation": "O Allah, forgive me and remove the rage from my heart.",
-                "meaning": "A short supplication to soften the heart and calm intense feelings.",
-                "reference": "A general supplication consistent with Islamic teachings.",
-                "audio": get_audio_path("angry.mp4"),
-            },
-            "sad": {
-                "title": "When feeling sadness or worry",
-                "arabic": "اللَّهُمَّ إِنِّي أَعُوذُ بِكَ مِنَ الْهَمِّ وَالْحَزَنِ",
-                "english_pronunciation": "Allahumma inni a'udhu bika min al-hammi wal-hazan",
-                "hindi_pronunciation": "अल्लाहुम्मा इन्नी आउज़ु बिका मिन अल-हम्मि वल-हज़न",
-                "translation": "O Allah, I seek refuge in You from anxiety and sorrow.",
-                "meaning": "A dua to seek relief from emotional burdens and sadness.",
-                "reference": "Sahih al-Bukhari",
-                "audio": get_audio_path("sad.mp4"),
-            },
-            "happy": {
-                "title": "Gratefulness for blessings",
-                "arabic": "ٱلْحَمْدُ لِلَّٰهِ الَّذِي بِنِعْمَتِهِ تَتِمُّ ٱلصَّالِحَاتُ",
-                "english_pronunciation": "Alhamdu lillahi alladhi bi ni'matihi tatimmu as-salihat",
-                "hindi_pronunciation": "अल-हम्दु लिल्लाहि अल्लज़ी बि नि'मतिही ततिम्मु अस-सालिहात",
-                "translation": "All praise is for Allah by whose favor good works are completed.",
-                "meaning": "A remembrance to show gratitude when things go well.",
-                "reference": "Sunan Ibn Majah",
-                "audio": get_audio_path("happy.mp4"),
-            },
-            "neutral": {
-                "title": "Seeking knowledge and guidance",
-                "arabic": "رَبِّ زِدْنِي عِلْمًا",
-                "english_pronunciation": "Rabbi zidni ilma",
-                "hindi_pronunciation": "रब्बी ज़िद्नी इल्मा",
-                "translation": "My Lord, increase me in knowledge.",
-                "meaning": "A simple dua for growth, clarity and beneficial knowledge.",
-                "reference": "Qur'an 20:114",
-                "audio": get_audio_path("neutral.mp4"),
-            },
-            "surprise": {
-                "title": "For moments of amazement",
-                "arabic": "سُبْحَانَ اللَّهِ وَبِحَمْدِهِ",
-                "english_pronunciation": "Subhanallahi wa bihamdihi",
-                "hindi_pronunciation": "सुब्हानल्लाहि व बिहम्दिही",
-                "translation": "Glory and praise be to Allah.",
-                "meaning": "A light dhikr suitable when something unexpected happens.",
-                "reference": "Sahih Muslim",
-                "audio": get_audio_path("surprise.mp4"),
-            },
-        }
-
-        return duas.get(
-            emotion,
-            {
-                "title": "A gentle remembrance",
-                "arabic": "سُبْحَانَ اللَّهِ وَبِحَمْدِهِ سُبْحَانَ اللَّهِ الْعَظِيمِ",
-                "english_pronunciation": "Subhanallahi wa bihamdihi, subhanallahi al-azeem",
-                "hindi_pronunciation": "सुब्हानल्लाहि व बिहम्दिही, सुब्हानल्लाहि अल-अज़ीम",
-                "translation": "Glory and praise be to Allah, glory be to Allah the Most Great.",
-                "meaning": "A general dhikr that brings peace to the heart.",
-                "reference": "Sahih al-Bukhari",
-                "audio": get_audio_path("normal.mp4"),
-            },
-        )
+        return self.engine.dua_for(emotion)
 
     # --------------------------------------------------
     # UI helpers & new features
@@ -634,6 +635,7 @@ class EmotionDuaApp(QMainWindow):
 
         label = (source_emotion or "---").upper()
         self.emotion_label.setText(f"Emotion: {label}")
+        self.emotion_label.setToolTip("")
 
         self.dua_title_label.setText(dua.get("title", ""))
         self.dua_arabic_label.setText(dua.get("arabic", ""))
@@ -658,8 +660,12 @@ class EmotionDuaApp(QMainWindow):
         self.dua_meaning_label.setText(dua.get("meaning", ""))
         self.dua_reference_label.setText(f"Reference: {dua.get('reference', '')}")
 
+        # The catalog only returns audio paths for files that exist
         audio_path = dua.get("audio")
-        if audio_path and os.path.exists(audio_path):
+        if audio_path != self.current_audio_path and not self.is_playing_audio:
+            # Drop a paused recitation so Listen starts the new one
+            self.stop_audio()
+        if audio_path:
             self.current_audio_path = audio_path
             self.audio_btn.setEnabled(True)
             print(f"✅ Audio file loaded: {audio_path}")
@@ -667,8 +673,6 @@ class EmotionDuaApp(QMainWindow):
             self.current_audio_path = None
             self.stop_audio()
             self.audio_btn.setEnabled(False)
-            if audio_path:
-                print(f"⚠️ Audio file not found: {audio_path}")
         
         # Reset button state
         if not self.is_playing_audio:
@@ -679,114 +683,44 @@ class EmotionDuaApp(QMainWindow):
 
     def stop_audio(self):
         """Stop any currently playing audio"""
-        self.audio_status_timer.stop()  # Stop status checking timer
-        if self.audio_player:
-            try:
-                self.audio_player.pause()
-                self.audio_player.delete()
-                self.audio_player = None
-            except:
-                pass
-        self.is_playing_audio = False
-    
-    def check_audio_status(self):
-        """Check if audio is still playing and update button (called from main thread)"""
-        if self.audio_player:
-            if not self.audio_player.playing and self.is_playing_audio:
-                # Audio finished
-                self.is_playing_audio = False
-                self.audio_btn.setText("▶ Listen")
-                self.audio_status_timer.stop()
-                print("✅ Audio finished")
-        else:
-            # No player, stop timer
-            if self.is_playing_audio:
-                self.is_playing_audio = False
-                self.audio_btn.setText("▶ Listen")
-            self.audio_status_timer.stop()
-    
-    def play_audio_in_thread(self, audio_path):
-        """Play audio in a separate thread to avoid blocking UI"""
-        try:
-            if not PYGLET_AVAILABLE:
-                print("❌ pyglet not available. Please install: pip install pyglet")
-                self.is_playing_audio = False
-                # Use QTimer to update UI from main thread
-                QTimer.singleShot(0, lambda: self.audio_btn.setText("▶ Listen"))
-                return
-            
-            # Create pyglet player (supports .mp4, .mp3, .wav, etc.)
-            try:
-                source = pyglet.media.load(audio_path)
-                self.audio_player = pyglet.media.Player()
-                self.audio_player.queue(source)
-                self.audio_player.play()
-                
-                # Wait for audio to finish (simplified approach)
-                # Timer is already started from main thread in toggle_audio()
-                import time
-                while self.is_playing_audio and self.audio_player and self.audio_player.playing:
-                    time.sleep(0.1)
-                    # Update pyglet clock to keep playback going
-                    pyglet.clock.tick()
-                
-            except Exception as e:
-                print(f"❌ Failed to load/play audio: {e}")
-                self.is_playing_audio = False
-                # Use QTimer to update UI from main thread
-                QTimer.singleShot(0, lambda: self.audio_btn.setText("▶ Listen"))
-                
-        except Exception as e:
-            print(f"❌ Audio playback error: {e}")
-            self.is_playing_audio = False
-            # Use QTimer to update UI from main thread
-            QTimer.singleShot(0, lambda: self.audio_btn.setText("▶ Listen"))
-    
+        if self.audio_engine:
+            self.audio_engine.stop()
+
+    def on_audio_state_changed(self, state, path):
+        self.is_playing_audio = state == PLAYING
+        self.audio_btn.setText("⏸ Pause" if self.is_playing_audio else "▶ Listen")
+
+    def on_audio_finished(self, path):
+        print("✅ Audio finished")
+
+    def on_audio_failed(self, message):
+        print(f"❌ Failed to load/play audio: {message}")
+
     def toggle_audio(self):
         """Toggle audio playback using pyglet (plays within the app, supports .mp4 on Windows)"""
         if not self.current_audio_path or not os.path.exists(self.current_audio_path):
             print("⚠️ No audio file available")
             return
 
-        if not PYGLET_AVAILABLE:
+        if not self.audio_engine:
             print("❌ pyglet not available. Please install: pip install pyglet")
             self.audio_btn.setEnabled(False)
             return
 
-        try:
-            if self.is_playing_audio:
-                # Stop audio
-                self.stop_audio()
-                self.audio_btn.setText("▶ Listen")
-                print("⏸ Audio stopped")
-            else:
-                # Play audio in separate thread
-                self.is_playing_audio = True
-                self.audio_btn.setText("⏸ Pause")
-                print(f"▶ Playing audio: {self.current_audio_path}")
-                
-                # Start timer to check audio status (must be started from main thread)
-                self.audio_status_timer.start(200)  # Check every 200ms
-                
-                # Start audio in background thread
-                self.audio_thread = threading.Thread(
-                    target=self.play_audio_in_thread,
-                    args=(self.current_audio_path,),
-                    daemon=True
-                )
-                self.audio_thread.start()
-        except Exception as e:
-            print(f"❌ Audio playback error: {e}")
-            self.audio_btn.setEnabled(False)
+        if self.is_playing_audio:
+            self.audio_engine.pause()
+            print("⏸ Audio paused")
+        else:
+            # Resumes if this recitation was paused, otherwise starts it
+            self.audio_engine.play(self.current_audio_path)
+            print(f"▶ Playing audio: {self.current_audio_path}")
 
     def on_feedback(self, helpful: bool):
         if not self.current_dua:
             return
 
         # Append feedback to last history item if any
-        if self.history:
-            self.history[-1]["helpful"] = bool(helpful)
-            self._save_history()
+        if self.history_store.set_feedback(helpful):
             self._refresh_history_view()
 
         msg = "Alhamdulillah 🌙" if helpful else "Noted. May Allah ease your heart."
@@ -820,31 +754,14 @@ class EmotionDuaApp(QMainWindow):
     # History & persistence
     # --------------------------------------------------
     def _load_history(self):
-        try:
-            if os.path.exists(self.history_path):
-                with open(self.history_path, "r", encoding="utf-8") as f:
-                    self.history = json.load(f)
-        except Exception:
-            self.history = []
-
-    def _save_history(self):
-        try:
-            with open(self.history_path, "w", encoding="utf-8") as f:
-                json.dump(self.history, f, ensure_ascii=False, indent=2)
-        except Exception:
-            # Keep the app running even if disk write fails
-            pass
+        self.history = self.history_store.load()
 
     def _add_history_entry(self, emotion: str, dua: dict):
-        entry = {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "emotion": emotion,
-            "dua_title": dua.get("title", ""),
-        }
-        self.history.append(entry)
-        # Keep only latest 20 entries
-        self.history = self.history[-20:]
-        self._save_history()
+        # Unchanged emotions are skipped, so disk and view work follow real changes
+        entry = self.history_store.add(emotion, dua.get("title", ""))
+        if entry is None:
+            return
+        self.history = self.history_store.entries
         self._refresh_history_view()
 
     def _refresh_history_view(self):
@@ -863,30 +780,19 @@ class EmotionDuaApp(QMainWindow):
         self.history_label.setText(html_content)
 
     # --------------------------------------------------
-    # Simple keyword mapping for text-based emotion input
+    # Text-based emotion input (see text_emotion.py)
     # --------------------------------------------------
     def _map_text_to_emotion(self, text: str) -> str:
-        text = text.lower()
-
-        mapping = {
-            "angry": ["angry", "frustrated", "irritated", "annoyed", "upset", "mad", "furious"],
-            "sad": ["sad", "depressed", "down", "lonely", "heartbroken", "anxious", "worried", "sorrowful"],
-            "happy": ["happy", "grateful", "thankful", "excited", "joyful", "glad", "cheerful"],
-            "neutral": ["ok", "fine", "normal", "calm", "alright", "good"],
-            "surprise": ["surprise", "surprised", "shocked", "amazed", "astonished", "wow", "unexpected"],
-        }
-
-        for emotion, keywords in mapping.items():
-            if any(word in text for word in keywords):
-                return emotion
-
-        return "neutral"
+        return self.engine.text_emotion(text)
 
     # --------------------------------------------------
     def closeEvent(self, event):
         self.stop_camera()
-        # Stop any playing audio
-        self.stop_audio()
+        # Stop any playing audio and the audio worker
+        if self.audio_engine:
+            self.audio_engine.shutdown()
+        # Write out pending history entries
+        self.history_store.close()
         event.accept()
 
 
@@ -0,0 +1,47 @@
+"""
+Background model loading for the GUI.
+
+Importing TensorFlow and loading the model takes seconds, so it happens on a
+worker thread after the window is shown. A dummy forward pass warms up the
+kernels so the first real frame is not slow either. The model's manifest
+and output size are checked against the classes the app expects. The result
+comes back to the GUI thread through Qt signals.
+"""
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from inference import load_backend, warm_up
+from model_manifest import verify_model
+
+
+class ModelLoader(QObject):
+    # The ready-to-use inference backend
+    loaded = pyqtSignal(object)
+    # Error message if the model could not be loaded
+    failed = pyqtSignal(str)
+
+    def __init__(self, model_path, classes, parent=None):
+        super().__init__(parent)
+        self.model_path = model_path
+        self.classes = list(classes)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            backend = load_backend(self.model_path)
+            probs = warm_up(backend)
+            manifest = verify_model(self.model_path, self.classes, num_outputs=probs.shape[-1])
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if manifest is None:
+            print("⚠️ Model has no manifest; only its output size was checked")
+        print(f"✅ Model ready in {time.perf_counter() - started:.1f}s")
+        self.loaded.emit(backend)